@@ -224,6 +224,14 @@ PATH_SEGMENT_TIMES: Dict[Tuple[str, str], float] = {
 }
 
 
+# 双向查找表：路径可双向通行，反向键先写入、正向键覆盖，
+# 与先查正向再查反向的语义一致，单次字典查找即可
+_BIDIRECTIONAL_SEGMENT_TIMES: Dict[Tuple[str, str], float] = {
+    (end, start): time for (start, end), time in PATH_SEGMENT_TIMES.items()
+}
+_BIDIRECTIONAL_SEGMENT_TIMES.update(PATH_SEGMENT_TIMES)
+
+
 def get_travel_time(from_point: str, to_point: str) -> float:
     """
     Get travel time between two path points, considering bidirectional paths.
@@ -235,14 +243,7 @@ def get_travel_time(from_point: str, to_point: str) -> float:
     Returns:
         Travel time in seconds, or -1.0 if path not found
     """
-    segment = (from_point, to_point)
-    segment_reverse = (to_point, from_point)
-    if segment in PATH_SEGMENT_TIMES:
-        return PATH_SEGMENT_TIMES[segment]
-    elif segment_reverse in PATH_SEGMENT_TIMES:
-        return PATH_SEGMENT_TIMES[segment_reverse]
-    else:
-        return -1.0
+    return _BIDIRECTIONAL_SEGMENT_TIMES.get((from_point, to_point), -1.0)
 
 
 def get_all_reachable_points(from_point: str) -> Dict[str, float]:
@@ -276,6 +277,4 @@ def is_path_available(from_point: str, to_point: str) -> bool:
     Returns:
         True if direct path exists, False otherwise
     """
-    segment = (from_point, to_point)
-    segment_reverse = (to_point, from_point)
-    return segment in PATH_SEGMENT_TIMES or segment_reverse in PATH_SEGMENT_TIMES
+    return (from_point, to_point) in _BIDIRECTIONAL_SEGMENT_TIMES
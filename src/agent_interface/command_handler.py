@@ -3,7 +3,7 @@ import json
 import logging
 from typing import Dict, Any, Optional
 
-from config.schemas import AgentCommand, SystemResponse
+from config.schemas import AgentCommand, SystemResponse, DeviceStatus
 from config.topics import AGENT_COMMANDS_TOPIC, AGENT_RESPONSES_TOPIC
 from src.utils.mqtt_client import MQTTClient
 
@@ -387,7 +387,6 @@ class CommandHandler:
                 success = True
             else:
                 # Fallback: force station to idle state
-                from src.simulation.entities.base import DeviceStatus
                 station.status = DeviceStatus.MAINTENANCE
                 logger.info(f"✅ Station {device_id} emergency stopped (forced to maintenance mode)")
                 success = True
@@ -412,7 +411,6 @@ class CommandHandler:
                 if hasattr(station, 'emergency_stop'):
                     station.emergency_stop()
                 else:
-                    from src.simulation.entities.base import DeviceStatus
                     station.status = DeviceStatus.MAINTENANCE
             
             # Stop all AGVs
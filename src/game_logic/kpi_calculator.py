@@ -1,7 +1,7 @@
 # src/game_logic/kpi_calculator.py
 import simpy
 import logging
-from typing import Dict, List, Optional, Any, TYPE_CHECKING
+from typing import Dict, List, Optional, Any, Tuple, TYPE_CHECKING
 from dataclasses import dataclass, field
 
 from config.schemas import KPIUpdate, NewOrder
@@ -9,6 +9,7 @@ from config.topics import KPI_UPDATE_TOPIC
 from src.utils.mqtt_client import MQTTClient
 from src.utils.topic_manager import TopicManager
 from src.utils.logger_config import get_sim_logger
+from src.utils.config_loader import load_factory_config
 
 if TYPE_CHECKING:
     from src.simulation.entities.product import Product
@@ -102,7 +103,6 @@ class KPICalculator:
         
         # Load configuration from YAML if not provided
         if config is None:
-            from src.utils.config_loader import load_factory_config
             config = load_factory_config()
         
         # Load KPI weights from config
@@ -158,6 +158,10 @@ class KPICalculator:
         # Track active faults count
         self._active_faults_count = 0
 
+        # 需要定期刷新总时间的设备 (device_id, line_id)，共用一个定时进程
+        self._total_time_devices: List[Tuple[str, Optional[str]]] = []
+        self._total_time_process: Optional[simpy.Process] = None
+
     def _check_and_publish_kpi_update(self):
         """Calculate KPIs and publish only if changed."""
         kpi_update = self.calculate_current_kpis()
@@ -392,15 +396,37 @@ class KPICalculator:
 
     def update_device_utilization(self, device_id: str, line_id: Optional[str], total_time: float):
         """Update device total time for utilization calculation."""
+        self._set_device_total_time(device_id, line_id, total_time)
+        
+        # Trigger KPI update on device utilization change
+        self._check_and_publish_kpi_update()
+
+    def _set_device_total_time(self, device_id: str, line_id: Optional[str], total_time: float):
         internal_device_key = f"{line_id}_{device_id}" if line_id else device_id
         self.stats.device_total_time[internal_device_key] = total_time
         # Ensure device has a working_time entry to prevent KeyError
         if internal_device_key not in self.stats.device_working_time:
             self.stats.device_working_time[internal_device_key] = 0.0
-        
-        # Trigger KPI update on device utilization change
-        self._check_and_publish_kpi_update()
     
+    def register_total_time_device(self, device_id: str, line_id: Optional[str]):
+        """
+        Register a device whose total time is refreshed every 10 seconds for
+        utilization. All registered devices share a single timer process.
+        """
+        self._total_time_devices.append((device_id, line_id))
+        if self._total_time_process is None:
+            self._total_time_process = self.env.process(self._update_total_times())
+
+    def _update_total_times(self):
+        """Background process to update total time of all registered devices"""
+        while True:
+            yield self.env.timeout(10.0)  # Update every 10 seconds
+            now = self.env.now
+            for device_id, line_id in self._total_time_devices:
+                self._set_device_total_time(device_id, line_id, now)
+            # 所有设备刷新完后只重算一次KPI，而不是每个设备各算一次
+            self._check_and_publish_kpi_update()
+
     def track_device_working_time(self, device_id: str, line_id: Optional[str], duration: float):
         """Track actual working time for a device"""
         internal_device_key = f"{line_id}_{device_id}" if line_id else device_id
@@ -548,7 +574,6 @@ class KPICalculator:
                 if self.topic_manager:
                     topic = self.topic_manager.get_kpi_topic()
                 else:
-                    from config.topics import KPI_UPDATE_TOPIC
                     topic = KPI_UPDATE_TOPIC
                 self.mqtt_client.publish(topic, kpi_update.model_dump_json())
                 # self.logger.debug("📊 KPI Update published")
@@ -10,8 +10,10 @@ from src.simulation.entities.quality_checker import QualityChecker
 from src.simulation.entities.station import Station
 from src.simulation.entities.conveyor import Conveyor, TripleBufferConveyor
 from src.simulation.entities.warehouse import RawMaterial, Warehouse
-from config.schemas import DeviceStatus, AGVStatus
+from config.schemas import DeviceStatus
 from src.utils.topic_manager import TopicManager
+from src.utils.mqtt_client import dumps_payload, STATUS_QOS
+from config.topics import get_agv_status_topic
 from config.path_timing import get_travel_time, is_path_available
 
 class AGV(Vehicle):
@@ -60,6 +62,12 @@ class AGV(Vehicle):
         self.logger = logger
         self.topic_manager = topic_manager
         self.line_id = line_id
+        # 状态主题在AGV生命周期内不变，初始化时计算一次
+        if topic_manager and line_id:
+            self._status_topic = topic_manager.get_agv_status_topic(line_id, id)
+        else:
+            self._status_topic = get_agv_status_topic(id)
+        self._mqtt_publish = mqtt_client.publish if mqtt_client else None
         self.battery_level = battery_level
         self.payload_capacity = payload_capacity
         self.payload = simpy.Store(env, capacity=payload_capacity)
@@ -161,7 +169,9 @@ class AGV(Vehicle):
     def _move_to_process(self, target_point: str):
         """The actual process logic for move_to, to be wrapped by self.action."""
         try:
-            if target_point not in self.path_points:
+            # 目标坐标只查一次，后续日志和到达时的位置更新直接复用
+            target_pos = self.path_points.get(target_point)
+            if target_pos is None:
                 msg = f"Unknown path point {target_point}"
                 self.logger.error(f"❌ {self.id}: {msg}")
                 return False, msg
@@ -192,14 +202,14 @@ class AGV(Vehicle):
                 return False, f"{msg}, emergency charging"
                 
             self.set_status(DeviceStatus.MOVING, f"moving to {target_point} from {self.current_point}, estimated time: {travel_time:.1f}s")
-            self.logger.debug(f"🚛 {self.id}: move to path point {target_point} {self.path_points[target_point]} (estimated time: {travel_time:.1f}s)")
+            self.logger.debug(f"🚛 {self.id}: move to path point {target_point} {target_pos} (estimated time: {travel_time:.1f}s)")
             
             # wait for move to complete
             self.estimated_time = travel_time
             yield self.env.timeout(travel_time)
             
             # update position and consume battery
-            self.position = self.path_points[target_point]
+            self.position = target_pos
             self.current_point = target_point
             self.target_point = None
             self.estimated_time = 0.0
@@ -416,8 +426,12 @@ class AGV(Vehicle):
                 else:
                     success = yield self.env.process(device.add_product_to_buffer(product))
                         
+            # Warehouse: 放入不会阻塞，直接调用
+            elif isinstance(device, Warehouse):
+                success = device.add_product_to_buffer(product)
+
             # Station (父类)
-            elif isinstance(device, Station) or isinstance(device, Warehouse):
+            elif isinstance(device, Station):
                 success = yield self.env.process(device.add_product_to_buffer(product))
                     
             # TripleBufferConveyor (先检查子类)
@@ -466,7 +480,7 @@ class AGV(Vehicle):
 
     def charge_battery(self, target_level: float = 100.0, message: Optional[str] = None, is_emergency: bool = False):
         """Charge battery to target level. Returns (success, feedback_message)"""
-        if self.status == DeviceStatus.CHARGING:
+        if self.status is DeviceStatus.CHARGING:
             msg = f"already charging"
             self.logger.debug(f"🔋 {self.id}: {msg}")
             return True, msg
@@ -590,7 +604,7 @@ class AGV(Vehicle):
             yield self.env.timeout(5.0)
             
             # if battery is low and not charging, start emergency charging
-            if self.is_battery_low() and self.status != DeviceStatus.CHARGING:
+            if self.is_battery_low() and self.status is not DeviceStatus.CHARGING:
                 self.logger.warning(f"🔋 {self.id}: battery is low, start emergency charging")
                 yield self.env.process(self.emergency_charge())
 
@@ -598,7 +612,7 @@ class AGV(Vehicle):
         """获取电池状态信息"""
         return {
             "battery_level": self.battery_level,
-            "is_charging": self.status == DeviceStatus.CHARGING,
+            "is_charging": self.status is DeviceStatus.CHARGING,
             "is_low_battery": self.is_battery_low(),
             "charging_point": self.charging_point,
             "can_operate": not self.is_battery_low(),
@@ -664,10 +678,10 @@ class AGV(Vehicle):
         # Track fault time for KPI
         if self.kpi_calculator:
             # If transitioning to FAULT status, record the start time
-            if new_status == DeviceStatus.FAULT and self.status != DeviceStatus.FAULT:
+            if new_status is DeviceStatus.FAULT and self.status is not DeviceStatus.FAULT:
                 self._fault_start_time = self.env.now
             # If transitioning from FAULT to any other status, record the fault duration
-            elif self.status == DeviceStatus.FAULT and new_status != DeviceStatus.FAULT:
+            elif self.status is DeviceStatus.FAULT and new_status is not DeviceStatus.FAULT:
                 if hasattr(self, '_fault_start_time'):
                     fault_duration = self.env.now - self._fault_start_time
                     self.kpi_calculator.update_agv_fault_time(self.id, self.line_id, fault_duration)
@@ -682,22 +696,19 @@ class AGV(Vehicle):
         if not self.mqtt_client:
             return
 
-        status_payload = AGVStatus(
-            timestamp=self.env.now,
-            source_id=self.id,
-            status=self.status,
-            speed_mps=self.speed_mps,
-            current_point=self.current_point,
-            target_point=self.target_point,
-            estimated_time=self.estimated_time,
-            position={'x': self.position[0], 'y': self.position[1]},
-            payload=[p.id for p in self.payload.items] if self.payload else [],
-            battery_level=self.battery_level,
-            message=message
-        )
-        if self.topic_manager and self.line_id:
-            topic = self.topic_manager.get_agv_status_topic(self.line_id, self.id)
-        else:
-            from config.topics import get_agv_status_topic
-            topic = get_agv_status_topic(self.id)
-        self.mqtt_client.publish(topic, status_payload.model_dump_json(), retain=False)
+        x, y = self.position
+        # 字段与AGVStatus一致，直接序列化字典以跳过Pydantic校验
+        status_data = {
+            "timestamp": float(self.env.now),
+            "source_id": self.id,
+            "status": self.status.value,
+            "speed_mps": float(self.speed_mps),
+            "current_point": self.current_point,
+            "position": {'x': float(x), 'y': float(y)},
+            "target_point": self.target_point,
+            "estimated_time": float(self.estimated_time),
+            "payload": [p.id for p in self.payload.items] if self.payload else [],
+            "battery_level": float(self.battery_level),
+            "message": message
+        }
+        self._mqtt_publish(self._status_topic, dumps_payload(status_data), qos=STATUS_QOS, retain=False)
@@ -8,7 +8,8 @@ from dataclasses import dataclass
 
 from config.schemas import DeviceStatus, DeviceDetailedStatus
 from src.utils.topic_manager import TopicManager
-from config.topics import DEVICE_ALERT_TOPIC
+from config.topics import DEVICE_ALERT_TOPIC, get_conveyor_status_topic
+from src.utils.logger_config import SIM_DEBUG
 
 class Device:
     """
@@ -52,19 +53,24 @@ class Device:
         if self.status != new_status:
             old_status = self.status
             self.status = new_status
-            log_message = f"[{self.env.now:.2f}] 🔄 {self.id}: 状态变更 {old_status.value} → {new_status.value}"
-            if message:
-                log_message += f" ({message})"
-            print(log_message)
+            if SIM_DEBUG:
+                log_message = f"[{self.env.now:.2f}] 🔄 {self.id}: 状态变更 {old_status.value} → {new_status.value}"
+                if message:
+                    log_message += f" ({message})"
+                print(log_message)
 
     def can_operate(self) -> bool:
         """检查设备是否可以操作"""
         # 检查冻结状态
-        return self.status not in [DeviceStatus.FAULT, DeviceStatus.MAINTENANCE, DeviceStatus.BLOCKED]
+        status = self.status
+        # 枚举成员是单例，用身份比较代替列表成员检查
+        return (status is not DeviceStatus.FAULT
+                and status is not DeviceStatus.MAINTENANCE
+                and status is not DeviceStatus.BLOCKED)
 
     def is_busy(self) -> bool:
         """检查设备是否忙碌"""
-        return self.status != DeviceStatus.IDLE
+        return self.status is not DeviceStatus.IDLE
     
     def get_detailed_status(self) -> DeviceDetailedStatus:
         """获取设备详细状态"""
@@ -109,7 +115,8 @@ class Device:
             }
         }
         self._publish_fault_event(topic, payload)
-        print(f"[{self.env.now:.2f}] 📦 {self.id}: 缓冲区满告警 ({buffer_name})")
+        if SIM_DEBUG:
+            print(f"[{self.env.now:.2f}] 📦 {self.id}: 缓冲区满告警 ({buffer_name})")
 
     def _publish_fault_event(self, topic: str, payload: dict):
         """发布故障事件到MQTT"""
@@ -123,9 +130,56 @@ class Device:
         """Default recovery logic."""
         # 只有当设备处于FAULT状态时才恢复
         # 避免覆盖其他合法状态（如BLOCKED）
-        if self.status == DeviceStatus.FAULT:
+        if self.status is DeviceStatus.FAULT:
             self.set_status(DeviceStatus.IDLE)
 
+class CoalescedStatusPublisher:
+    """
+    状态发布合并混入类：status_publish_interval窗口内的多次发布请求只发送一次最新快照。
+    子类实现_publish_status_now(message)，需要跳过合并窗口时重写_needs_immediate_flush()。
+    """
+    def _init_status_coalescing(self, status_publish_interval: float = 0.0):
+        self.status_publish_interval = status_publish_interval
+        self._flush_deadline = None  # 当前等待中的发布截止事件
+        self._pending_status_message = None
+        self._last_published_status = None
+
+    def publish_status(self, message: Optional[str] = None):
+        """
+        Requests a status publish. Requests within status_publish_interval are
+        coalesced and the latest snapshot is published once with the latest message.
+        """
+        if not self.mqtt_client:
+            return
+        if message is not None:
+            self._pending_status_message = message
+
+        if self._needs_immediate_flush():
+            self.flush_status()
+        elif self._flush_deadline is None:
+            self._flush_deadline = self.env.timeout(self.status_publish_interval)
+            self._flush_deadline.callbacks.append(self._on_flush_deadline)
+
+    def _needs_immediate_flush(self) -> bool:
+        """返回True时跳过合并窗口立即发布，默认总是合并"""
+        return False
+
+    def _on_flush_deadline(self, event: simpy.Event):
+        # 截止前已被立即发布过时，旧的截止事件直接忽略
+        if event is self._flush_deadline:
+            self.flush_status()
+
+    def flush_status(self):
+        """立即发布当前状态快照，并清空等待中的发布请求"""
+        message = self._pending_status_message
+        self._pending_status_message = None
+        self._flush_deadline = None
+        self._last_published_status = self.status
+        self._publish_status_now(message)
+
+    def _publish_status_now(self, message: Optional[str] = None):
+        raise NotImplementedError
+
 class Vehicle(Device):
     """
     Base class for mobile entities like AGVs.
@@ -140,6 +194,40 @@ class BaseConveyor(Device, ABC):
     """
     def __init__(self, env: simpy.Environment, id: str, position: Tuple[int, int], transfer_time: float, line_id: Optional[str] = None, interacting_points: list = [], topic_manager: Optional[TopicManager] = None, mqtt_client=None):
         super().__init__(env, id, position, "conveyor", mqtt_client, interacting_points)
+        # 传送带可运行且有空位时触发的事件，供上游工站等待，替代轮询
+        self._space_event = env.event()
+        self._status_topic: Optional[str] = None
+        self._mqtt_publish = mqtt_client.publish if mqtt_client else None
+        # 上次发布的状态快照，未变化时跳过重复发布
+        self._last_published_snapshot = None
+
+    def set_status(self, new_status: DeviceStatus, message: Optional[str] = None):
+        old_status = self.status
+        super().set_status(new_status, message)
+        if self.status is not old_status:
+            self._signal_space()
+
+    def _signal_space(self):
+        """状态变化或有产品离开后调用：可接收产品时唤醒等待者并重新布置事件"""
+        if self.can_operate() and not self.is_full():
+            self._space_event.succeed()
+            self._space_event = self.env.event()
+
+    def _get_status_topic(self) -> str:
+        """状态topic只依赖id/line_id，首次计算后缓存"""
+        topic = self._status_topic
+        if topic is None:
+            if self.topic_manager and self.line_id:
+                topic = self.topic_manager.get_conveyor_status_topic(self.line_id, self.id)
+            else:
+                topic = get_conveyor_status_topic(self.id)
+            self._status_topic = topic
+        return topic
+
+    def wait_until_ready(self):
+        """等待传送带可运行且有空位（在上游进程中 yield from 使用）"""
+        while not self.can_operate() or self.is_full():
+            yield self._space_event
 
     @abstractmethod
     def push(self, product):
@@ -1,13 +1,20 @@
 # simulation/entities/conveyor.py
 import simpy
 import logging
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
 
 from src.simulation.entities.base import BaseConveyor
 from src.simulation.entities.product import Product
 from src.utils.topic_manager import TopicManager
-from config.schemas import DeviceStatus, ConveyorStatus
-from config.topics import get_conveyor_status_topic
+from config.schemas import DeviceStatus
+from src.utils.mqtt_client import dumps_payload, STATUS_QOS
+
+# 工艺流程连线：(上游工站, 传送带, 下游工站)
+PROCESS_FLOW_LINKS = (
+    ("StationA", "Conveyor_AB", "StationB"),
+    ("StationB", "Conveyor_BC", "StationC"),
+    ("StationC", "Conveyor_CQ", "QualityCheck"),  # Conveyor_CQ为TripleBufferConveyor
+)
 
 class Conveyor(BaseConveyor):
     """
@@ -39,29 +46,32 @@ class Conveyor(BaseConveyor):
                # Initialize device utilization tracking
         if self.kpi_calculator:
             self.kpi_calculator.update_device_utilization(self.id, self.line_id, 0.0)
-        
-        # Start background process to update total time for utilization calculation
-        self.env.process(self._update_total_time())
+            # Total time for utilization is refreshed by the KPI calculator's shared timer
+            self.kpi_calculator.register_total_time_device(self.id, self.line_id)
 
     def publish_status(self, message: Optional[str] = None):
         """直接发布传送带状态，不通过set_status"""
         if not self.mqtt_client or not self.mqtt_client.is_connected():
             return
 
-        status_data = ConveyorStatus(
-            timestamp=self.env.now,
-            source_id=self.id,
-            status=self.status,
-            buffer=[p.id for p in self.buffer.items],
-            message=message,
-            upper_buffer=None,
-            lower_buffer=None
-        )
-        if self.topic_manager and self.line_id:
-            topic = self.topic_manager.get_conveyor_status_topic(self.line_id, self.id)
-        else:
-            topic = get_conveyor_status_topic(self.id)
-        self.mqtt_client.publish(topic, status_data.model_dump_json(), retain=False)
+        buffer_ids = [p.id for p in self.buffer.items]
+        # 状态、消息和buffer内容都与上次发布相同时跳过
+        snapshot = (self.status, message, buffer_ids)
+        if snapshot == self._last_published_snapshot:
+            return
+        self._last_published_snapshot = snapshot
+
+        # 字段与ConveyorStatus一致，直接序列化字典以跳过Pydantic校验
+        status_data = {
+            "timestamp": float(self.env.now),
+            "source_id": self.id,
+            "status": self.status.value,
+            "message": message,
+            "buffer": buffer_ids,
+            "upper_buffer": None,
+            "lower_buffer": None
+        }
+        self._mqtt_publish(self._get_status_topic(), dumps_payload(status_data), qos=STATUS_QOS, retain=False)
 
     def set_downstream_station(self, station):
         """Set the downstream station for auto-transfer."""
@@ -80,6 +90,7 @@ class Conveyor(BaseConveyor):
     def pop(self):
         """Remove and return a product from the conveyor (may block if empty)."""
         product = yield self.buffer.get()
+        self._signal_space()
         self.logger.debug(f"pop {product.id}, buffer={len(self.buffer.items)}/{self.capacity}")
         
         # 如果该产品有对应的处理进程，中断并删除它
@@ -114,13 +125,6 @@ class Conveyor(BaseConveyor):
             return self.buffer.items[0]
         return None
     
-    def _update_total_time(self):
-        """Background process to update total time for KPI utilization calculation"""
-        while True:
-            yield self.env.timeout(10.0)  # Update every 10 seconds
-            if self.kpi_calculator:
-                self.kpi_calculator.update_device_utilization(self.id, self.line_id, self.env.now)
-
     def run(self):
         """Main operational loop for the conveyor. This should NOT be interrupted by faults."""
         while True:
@@ -128,7 +132,7 @@ class Conveyor(BaseConveyor):
             yield self.env.process(self._wait_for_ready_state())
             
             # 检查是否应该解除阻塞状态
-            if self.status == DeviceStatus.BLOCKED:
+            if self.status is DeviceStatus.BLOCKED:
                 # 如果下游工站恢复正常或者没有正在等待的领头进程，解除阻塞
                 if self.downstream_station and self.downstream_station.can_operate():
                     if self.blocked_leader_process is None or not self.blocked_leader_process.is_alive:
@@ -139,7 +143,7 @@ class Conveyor(BaseConveyor):
             for item in list(self.buffer.items):  # 使用list避免迭代时修改
                 if item.id not in self.active_processes:
                     # 只有在非阻塞状态下才为新产品启动处理进程
-                    if self.status != DeviceStatus.BLOCKED:
+                    if self.status is not DeviceStatus.BLOCKED:
                         # 为这个产品启动一个处理进程
                         process = self.env.process(self.process_single_item(item))
                         self.active_processes[item.id] = process
@@ -186,7 +190,7 @@ class Conveyor(BaseConveyor):
                 return
             
             # 如果当前是blocked状态且不是领头产品，不应该继续
-            if self.status == DeviceStatus.BLOCKED:
+            if self.status is DeviceStatus.BLOCKED:
                 is_leader = len(self.buffer.items) > 0 and self.buffer.items[0].id == product.id
                 if not is_leader:
                     self.logger.debug(f"🚫 Product {product.id} blocked at start, not leader")
@@ -215,61 +219,42 @@ class Conveyor(BaseConveyor):
             # Track start of working time for KPI
             working_start_time = self.env.now
             yield self.env.timeout(remaining_time)
-            is_first_product = self.buffer.items[0].id == product.id
             # Report energy cost and working time for this transfer
             if self.kpi_calculator:
                 self.kpi_calculator.add_energy_cost(self.id, self.line_id, remaining_time, is_peak_hour=False)
                 # Working time is already tracked in add_energy_cost
             
-            # 传输完成，从buffer获取产品（get）
+            # 传输完成后等到自己成为队首再从buffer获取产品（get）
+            # 多个产品同时完成传输时，不能get别人的队首产品：放回时会排到队尾，不断轮转顺序；
+            # 也不能直接返回，否则run循环会为它重新启动一次完整的传输
+            while self.buffer.items[0].id != product.id:
+                yield self._space_event
             actual_product = yield self.buffer.get()
-
-            # 确保获取的是正确的产品
-            if actual_product.id != product.id:
-                # 如果不是预期的产品，放回去
-                yield self.buffer.put(actual_product)
-                msg = f"unexpected product order, retrying"
-                self.logger.warning(msg)
-                self.publish_status(msg)
-                return
+            self._signal_space()
             
             self.publish_status()
             
-            # 使用处理顺序信息
-            if is_first_product:
-                # 这是最前面的产品，设为领头进程
-                self.blocked_leader_process = self.env.active_process
-                self.logger.debug(f"🎯 {actual_product.id} is the leader product (first in order)")
-                
-                downstream_full = self.downstream_station.is_full()
-                self.logger.debug(f"🔍 Downstream buffer {len(self.downstream_station.buffer.items)}/{self.downstream_station.buffer.capacity}, full={downstream_full}, can opeatate:{self.downstream_station.can_operate()}")
-                    
-                if (downstream_full or not self.downstream_station.can_operate()) and self.status != DeviceStatus.BLOCKED:
-                    # 下游已满或下游工站不可操作，阻塞其他产品
-                    self._block_all_products()
-                    
-                while not self.downstream_station.can_operate():
-                    yield self.env.timeout(0.1)
-                # 尝试放入下游（可能会阻塞）
-                self.logger.debug(f"⏳ Leader {actual_product.id} trying to put to downstream...")
-                yield self.downstream_station.buffer.put(actual_product)
-                
-                # 成功放入，如果之前是阻塞状态，现在解除
-                if self.status == DeviceStatus.BLOCKED and self.downstream_station.can_operate():
-                    self._unblock_all_products()
-                    
-            else:
-                # 不是第一个产品
-                self.logger.debug(f"📦 {actual_product.id} is NOT the leader product (order: {[p.id for p in self.buffer.items]})")
+            # 这是最前面的产品，设为领头进程
+            self.blocked_leader_process = self.env.active_process
+            self.logger.debug(f"🎯 {actual_product.id} is the leader product (first in order)")
+            
+            downstream_full = self.downstream_station.is_full()
+            self.logger.debug(f"🔍 Downstream buffer {len(self.downstream_station.buffer.items)}/{self.downstream_station.buffer.capacity}, full={downstream_full}, can opeatate:{self.downstream_station.can_operate()}")
                 
-                # 非领头产品需要等待，直到轮到它或者传送带解除阻塞
-                while self.status == DeviceStatus.BLOCKED:
-                    self.logger.debug(f"⏳ {actual_product.id} waiting for its turn or unblock...")
-                    yield self.env.timeout(0.1)
+            if (downstream_full or not self.downstream_station.can_operate()) and self.status is not DeviceStatus.BLOCKED:
+                # 下游已满或下游工站不可操作，阻塞其他产品
+                self._block_all_products()
                 
-                # 现在可以尝试放入下游
-                yield self.downstream_station.buffer.put(actual_product)
+            while not self.downstream_station.can_operate():
+                yield self.env.timeout(0.1)
+            # 尝试放入下游（可能会阻塞）
+            self.logger.debug(f"⏳ Leader {actual_product.id} trying to put to downstream...")
+            yield self.downstream_station.buffer.put(actual_product)
             
+            # 成功放入，如果之前是阻塞状态，现在解除
+            if self.status is DeviceStatus.BLOCKED and self.downstream_station.can_operate():
+                self._unblock_all_products()
+
             actual_product.update_location(self.downstream_station.id, self.env.now)
             msg = f"moved product {actual_product.id} to {self.downstream_station.id}"
             self.logger.debug(msg)
@@ -309,6 +294,10 @@ class Conveyor(BaseConveyor):
                 # 这是故障中断
                 self.logger.warning(f"⚠️ Processing of product {product.id} was interrupted by fault")
                 
+                # 设置故障状态（先于下面可能阻塞的put，避免put在故障恢复后才完成时把传送带重新置为故障）
+                self.set_status(DeviceStatus.FAULT)
+                self.publish_status()
+                
                 # 如果产品已经取出，说明已完成传输，应该放入下游
                 if actual_product and actual_product not in self.buffer.items and self.downstream_station:
                     try:
@@ -334,10 +323,6 @@ class Conveyor(BaseConveyor):
                 else:
                     # 产品还在传输中，中断是合理的
                     self.logger.debug(f"🔄 Product {product.id} interrupted during transfer")
-                
-                # 设置故障状态
-                self.set_status(DeviceStatus.FAULT)
-                self.publish_status()
             
         finally:
             self.publish_status()
@@ -377,7 +362,7 @@ class Conveyor(BaseConveyor):
     
     def _block_all_products(self, reason="Downstream blocked"):
         """阻塞所有产品处理（除了正在等待的领头产品）"""
-        if self.status == DeviceStatus.BLOCKED:
+        if self.status is DeviceStatus.BLOCKED:
             self.logger.debug(f"already blocked, skip")
             return  # 已经处于阻塞状态
         
@@ -396,7 +381,7 @@ class Conveyor(BaseConveyor):
     
     def _unblock_all_products(self):
         """解除阻塞，允许产品继续处理"""
-        if self.status != DeviceStatus.BLOCKED:
+        if self.status is not DeviceStatus.BLOCKED:
             self.logger.debug(f"not blocked, skip unblock")
             return  # 不在阻塞状态
         
@@ -441,9 +426,8 @@ class TripleBufferConveyor(BaseConveyor):
         # Initialize device utilization tracking
         if self.kpi_calculator:
             self.kpi_calculator.update_device_utilization(self.id, self.line_id, 0.0)
-        
-        # Start background process to update total time for utilization calculation
-        self.env.process(self._update_total_time())
+            # Total time for utilization is refreshed by the KPI calculator's shared timer
+            self.kpi_calculator.register_total_time_device(self.id, self.line_id)
 
     def _should_be_blocked(self):
         """检查三缓冲传送带是否应该处于阻塞状态"""
@@ -456,20 +440,26 @@ class TripleBufferConveyor(BaseConveyor):
             return
 
         # 只发布，不修改状态
-        status_data = ConveyorStatus(
-            timestamp=self.env.now,
-            source_id=self.id,
-            status=self.status,
-            buffer=[p.id for p in self.main_buffer.items],
-            upper_buffer=[p.id for p in self.upper_buffer.items],
-            lower_buffer=[p.id for p in self.lower_buffer.items],
-            message=message,
-        )
-        if self.topic_manager and self.line_id:
-            topic = self.topic_manager.get_conveyor_status_topic(self.line_id, self.id)
-        else:
-            topic = get_conveyor_status_topic(self.id)
-        self.mqtt_client.publish(topic, status_data.model_dump_json(), retain=False)
+        buffer_ids = [p.id for p in self.main_buffer.items]
+        upper_ids = [p.id for p in self.upper_buffer.items]
+        lower_ids = [p.id for p in self.lower_buffer.items]
+        # 状态、消息和三个buffer内容都与上次发布相同时跳过
+        snapshot = (self.status, message, buffer_ids, upper_ids, lower_ids)
+        if snapshot == self._last_published_snapshot:
+            return
+        self._last_published_snapshot = snapshot
+
+        # 字段与ConveyorStatus一致，直接序列化字典以跳过Pydantic校验
+        status_data = {
+            "timestamp": float(self.env.now),
+            "source_id": self.id,
+            "status": self.status.value,
+            "message": message,
+            "buffer": buffer_ids,
+            "upper_buffer": upper_ids,
+            "lower_buffer": lower_ids
+        }
+        self._mqtt_publish(self._get_status_topic(), dumps_payload(status_data), qos=STATUS_QOS, retain=False)
 
     def set_downstream_station(self, station):
         """Set the downstream station for auto-transfer from main_buffer."""
@@ -498,6 +488,8 @@ class TripleBufferConveyor(BaseConveyor):
     def pop(self, buffer_type="main"):
         """Get product from specified buffer."""
         product = yield self.get_buffer(buffer_type).get()
+        if buffer_type == "main":
+            self._signal_space()
         self.logger.debug(f"pop {product.id} from {buffer_type} buffer, buffer={len(self.get_buffer(buffer_type).items)}/{self.get_buffer(buffer_type).capacity}")
         
         # 如果是从main_buffer取出且该产品有对应的处理进程，中断并删除它
@@ -546,7 +538,7 @@ class TripleBufferConveyor(BaseConveyor):
             yield self.env.process(self._wait_for_ready_state())
             
             # 检查是否应该解除阻塞状态
-            if self.status == DeviceStatus.BLOCKED:
+            if self.status is DeviceStatus.BLOCKED:
                 # 如果下游工站恢复正常或者没有正在等待的领头进程，解除阻塞
                 if self.downstream_station and self.downstream_station.can_operate() and not self.downstream_station.is_full():
                     if self.blocked_leader_process is None or not self.blocked_leader_process.is_alive:
@@ -557,7 +549,7 @@ class TripleBufferConveyor(BaseConveyor):
             for item in list(self.main_buffer.items):  # 使用list避免迭代时修改
                 if item.id not in self.active_processes:
                     # 只有在非阻塞状态下才为新产品启动处理进程
-                    if self.status != DeviceStatus.BLOCKED:
+                    if self.status is not DeviceStatus.BLOCKED:
                         # 为这个产品启动一个处理进程
                         process = self.env.process(self.process_single_item(item))
                         self.active_processes[item.id] = process
@@ -602,7 +594,7 @@ class TripleBufferConveyor(BaseConveyor):
                 return
             
             # 如果当前是blocked状态且不是领头产品，不应该继续
-            if self.status == DeviceStatus.BLOCKED:
+            if self.status is DeviceStatus.BLOCKED:
                 is_leader = len(self.main_buffer.items) > 0 and self.main_buffer.items[0].id == product.id
                 if not is_leader:
                     self.logger.debug(f"🚫 Product {product.id} blocked at start, not leader")
@@ -629,25 +621,17 @@ class TripleBufferConveyor(BaseConveyor):
             # Track start of working time for KPI
             working_start_time = self.env.now
             yield self.env.timeout(remaining_time)
-            
-            is_first_product = self.main_buffer.items[0].id == product.id
 
             # Report energy cost and working time for this transfer
             if self.kpi_calculator:
                 self.kpi_calculator.add_energy_cost(self.id, self.line_id, self.transfer_time, is_peak_hour=False)
                 # Working time is already tracked in add_energy_cost
             
-            # 获取产品
+            # 获取产品：等到自己成为队首再get（原因同Conveyor.process_single_item）
+            while self.main_buffer.items[0].id != product.id:
+                yield self._space_event
             actual_product = yield self.main_buffer.get()
-
-            # 确保获取的是正确的产品
-            if actual_product.id != product.id:
-                # 如果不是预期的产品，放回去
-                yield self.main_buffer.put(actual_product)
-                msg = f"unexpected product order, retrying"
-                self.logger.warning(msg)
-                self.publish_status(msg)
-                return
+            self._signal_space()
             
             self.publish_status()
             
@@ -666,72 +650,46 @@ class TripleBufferConveyor(BaseConveyor):
             self.logger.debug(msg)
             self.publish_status(msg)
             
-            if is_first_product:
-                # 这是最前面的产品，设为领头进程
-                self.blocked_leader_process = self.env.active_process
-                self.logger.debug(f"🎯 {actual_product.id} is the leader product (first in order)")
-                
-                self.logger.debug(f"🔍 {buffer_name} buffer {len(chosen_buffer.items)}/{chosen_buffer.capacity}, can opeatate:{self.downstream_station.can_operate()}")
-                
-                if buffer_name == "upper_buffer" or buffer_name == "lower_buffer":
-                    # 对于side buffer，如果选定的buffer满了，尝试动态切换到另一个
-                    while len(chosen_buffer.items) >= chosen_buffer.capacity:
-                        # 检查是否可以切换到另一个buffer
-                        other_buffer = self.lower_buffer if chosen_buffer == self.upper_buffer else self.upper_buffer
-                        other_buffer_name = "lower_buffer" if chosen_buffer == self.upper_buffer else "upper_buffer"
-                        
-                        if len(other_buffer.items) < other_buffer.capacity:
-                            # 切换到另一个有空位的buffer
-                            self.logger.info(f"🔄 Switching from full {buffer_name} to available {other_buffer_name}")
-                            chosen_buffer = other_buffer
-                            buffer_name = other_buffer_name
-                            actual_product.add_history(self.env.now, f"Switched to {buffer_name} of {self.id} for rework")
-                            msg = f"switched product {actual_product.id} to {buffer_name}"
-                            self.logger.debug(msg)
-                            self.publish_status(msg)
-                            break
-                        else:
-                            # 两个buffer都满了，需要阻塞
-                            if self.status != DeviceStatus.BLOCKED:
-                                self._block_all_products()
-                            yield self.env.timeout(0.1)
-                else:
-                    if (len(chosen_buffer.items) >= chosen_buffer.capacity or not self.downstream_station.can_operate()) and self.status != DeviceStatus.BLOCKED:
-                        # 下游已满，阻塞其他产品
-                        self._block_all_products()
-                    while len(chosen_buffer.items) >= chosen_buffer.capacity or not self.downstream_station.can_operate():
-                        yield self.env.timeout(1)
-                    
-                yield chosen_buffer.put(actual_product)
-
-                # 成功放入，如果之前是阻塞状态，现在解除
-                if self.status == DeviceStatus.BLOCKED:
-                    self._unblock_all_products()
+            # 这是最前面的产品，设为领头进程
+            self.blocked_leader_process = self.env.active_process
+            self.logger.debug(f"🎯 {actual_product.id} is the leader product (first in order)")
+            
+            self.logger.debug(f"🔍 {buffer_name} buffer {len(chosen_buffer.items)}/{chosen_buffer.capacity}, can opeatate:{self.downstream_station.can_operate()}")
+            
+            if buffer_name == "upper_buffer" or buffer_name == "lower_buffer":
+                # 对于side buffer，如果选定的buffer满了，尝试动态切换到另一个
+                while len(chosen_buffer.items) >= chosen_buffer.capacity:
+                    # 检查是否可以切换到另一个buffer
+                    other_buffer = self.lower_buffer if chosen_buffer == self.upper_buffer else self.upper_buffer
+                    other_buffer_name = "lower_buffer" if chosen_buffer == self.upper_buffer else "upper_buffer"
                     
+                    if len(other_buffer.items) < other_buffer.capacity:
+                        # 切换到另一个有空位的buffer
+                        self.logger.info(f"🔄 Switching from full {buffer_name} to available {other_buffer_name}")
+                        chosen_buffer = other_buffer
+                        buffer_name = other_buffer_name
+                        actual_product.add_history(self.env.now, f"Switched to {buffer_name} of {self.id} for rework")
+                        msg = f"switched product {actual_product.id} to {buffer_name}"
+                        self.logger.debug(msg)
+                        self.publish_status(msg)
+                        break
+                    else:
+                        # 两个buffer都满了，需要阻塞
+                        if self.status is not DeviceStatus.BLOCKED:
+                            self._block_all_products()
+                        yield self.env.timeout(0.1)
             else:
-                # 不是第一个产品
-                self.logger.debug(f"📦 {actual_product.id} is NOT the leader product (order: {[p.id for p in self.main_buffer.items]})")
-                
-                # 非领头产品需要等待，直到轮到它或者传送带解除阻塞
-                while self.status == DeviceStatus.BLOCKED:
-                    self.logger.debug(f"⏳ {actual_product.id} waiting for its turn or unblock...")
-                    yield self.env.timeout(0.1)
-                
-                # # 对于side buffer的产品，在放入前再次检查是否需要切换buffer
-                # if buffer_name == "upper_buffer" or buffer_name == "lower_buffer":
-                #     if len(chosen_buffer.items) >= chosen_buffer.capacity:
-                #         # 尝试切换到另一个buffer
-                #         other_buffer = self.lower_buffer if chosen_buffer == self.upper_buffer else self.upper_buffer
-                #         other_buffer_name = "lower_buffer" if chosen_buffer == self.upper_buffer else "upper_buffer"
-                        
-                #         if len(other_buffer.items) < other_buffer.capacity:
-                #             self.logger.info(f"🔄 Non-leader product switching from full {buffer_name} to available {other_buffer_name}")
-                #             chosen_buffer = other_buffer
-                #             buffer_name = other_buffer_name
-                #             actual_product.add_history(self.env.now, f"Switched to {buffer_name} of {self.id} for rework")
+                if (len(chosen_buffer.items) >= chosen_buffer.capacity or not self.downstream_station.can_operate()) and self.status is not DeviceStatus.BLOCKED:
+                    # 下游已满，阻塞其他产品
+                    self._block_all_products()
+                while len(chosen_buffer.items) >= chosen_buffer.capacity or not self.downstream_station.can_operate():
+                    yield self.env.timeout(1)
                 
-                # 现在可以尝试放入下游
-                yield chosen_buffer.put(actual_product)
+            yield chosen_buffer.put(actual_product)
+
+            # 成功放入，如果之前是阻塞状态，现在解除
+            if self.status is DeviceStatus.BLOCKED:
+                self._unblock_all_products()
 
             if not target_buffer in ["upper", "lower"]:
                 actual_product.update_location(self.downstream_station.id, self.env.now)
@@ -801,13 +759,6 @@ class TripleBufferConveyor(BaseConveyor):
         """Custom recovery logic for the TripleBufferConveyor."""
         self.logger.info(f"✅ TripleBufferConveyor {self.id} is recovering.")
         # 恢复后，它应该继续工作，而不是空闲
-    
-    def _update_total_time(self):
-        """Background process to update total time for KPI utilization calculation"""
-        while True:
-            yield self.env.timeout(10.0)  # Update every 10 seconds
-            if self.kpi_calculator:
-                self.kpi_calculator.update_device_utilization(self.id, self.line_id, self.env.now)
         
     def interrupt_all_processing(self):
         """Interrupt all active product processing. Called by fault system."""
@@ -821,7 +772,7 @@ class TripleBufferConveyor(BaseConveyor):
 
     def _block_all_products(self, reason="Downstream or side buffer blocked"):
         """阻塞所有产品处理（除了正在等待的领头产品）"""
-        if self.status == DeviceStatus.BLOCKED:
+        if self.status is DeviceStatus.BLOCKED:
             self.logger.debug(f"already blocked, skip")
             return  # 已经处于阻塞状态
         
@@ -840,7 +791,7 @@ class TripleBufferConveyor(BaseConveyor):
 
     def _unblock_all_products(self):
         """解除阻塞，允许产品继续处理"""
-        if self.status != DeviceStatus.BLOCKED:
+        if self.status is not DeviceStatus.BLOCKED:
             self.logger.debug(f"not blocked, skip unblock")
             return  # 不在阻塞状态
         
@@ -849,3 +800,21 @@ class TripleBufferConveyor(BaseConveyor):
         self.blocked_leader_process = None
         
         self.logger.info(f"✅ Unblocked, products can resume")
+
+
+def wire_conveyors(stations: Dict, conveyors: Dict[str, BaseConveyor]):
+    """
+    Bind conveyors to their upstream stations and set their downstream
+    stations (for auto-transfer) in one pass over PROCESS_FLOW_LINKS.
+    Links whose conveyor or stations are missing from the layout are skipped.
+    """
+    for station_id, conveyor_id, next_station_id in PROCESS_FLOW_LINKS:
+        conveyor = conveyors.get(conveyor_id)
+        if conveyor is None:
+            continue
+        station = stations.get(station_id)
+        if station is not None:
+            station.downstream_conveyor = conveyor
+        next_station = stations.get(next_station_id)
+        if next_station is not None:
+            conveyor.set_downstream_station(next_station)
@@ -5,6 +5,12 @@ from typing import List, Tuple, Dict, Optional
 from enum import Enum
 from dataclasses import dataclass
 
+from src.utils.logger_config import SIM_DEBUG
+
+# 产品类型到整数下标的映射，用于按类型索引的查表（如工站加工时间表）
+PRODUCT_TYPES = ("P1", "P2", "P3")
+PRODUCT_TYPE_IDX = {t: i for i, t in enumerate(PRODUCT_TYPES)}
+
 class QualityStatus(Enum):
     """产品质量状态"""
     UNKNOWN = "unknown"          # 未检测
@@ -18,6 +24,7 @@ class Product:
     Attributes:
         id (str): A unique identifier for the product instance.
         product_type (str): The type of the product (e.g., 'P1', 'P2').
+        type_idx (int): Index of product_type in PRODUCT_TYPES (-1 if unknown).
         order_id (str): The ID of the order this product belongs to.
         history (List[Tuple[float, str]]): A log of events for this product.
         quality_status (QualityStatus): Current quality status
@@ -31,6 +38,14 @@ class Product:
         
     """
     
+    # 产品数量随订单持续增长，用__slots__省去每个实例的__dict__
+    __slots__ = (
+        "id", "product_type", "type_idx", "order_id", "history",
+        "quality_status", "processing_stations", "rework_count", "inspection_count",
+        "current_location", "process_step", "visit_count",
+        "quality_score", "quality_factors",
+    )
+
     # 产品工艺路线定义 - 定义每种产品类型的标准加工顺序
     PROCESS_ROUTES = {
         "P1": ["RawMaterial", "StationA", "StationB", "StationC", "QualityCheck", "Warehouse"],
@@ -41,6 +56,7 @@ class Product:
     def __init__(self, product_type: str, order_id: str):
         self.id: str = f"prod_{product_type[1]}_{uuid.uuid4().hex[:8]}"
         self.product_type: str = product_type
+        self.type_idx: int = PRODUCT_TYPE_IDX.get(product_type, -1)
         self.order_id: str = order_id
         self.history: List[Tuple[float, str]] = []
         
@@ -170,7 +186,8 @@ class Product:
         # 记录历史
         self.add_history(timestamp, f"Moved from {old_location} to {new_location}")
         
-        print(f"[{timestamp:.2f}] 📦 {self.id}: 成功移动 {old_location} → {new_location}")
+        if SIM_DEBUG:
+            print(f"[{timestamp:.2f}] 📦 {self.id}: 成功移动 {old_location} → {new_location}")
         return True
     
     def get_next_expected_location(self) -> Optional[str]:
@@ -226,7 +243,8 @@ class Product:
         # 更新访问计数（重要：用于P3产品的流程控制）
         self.visit_count[station_id] = self.visit_count.get(station_id, 0) + 1
         
-        print(f"[{timestamp:.2f}] 📊 {self.id}: {station_id} 访问次数: {old_count} → {self.visit_count[station_id]}")
+        if SIM_DEBUG:
+            print(f"[{timestamp:.2f}] 📊 {self.id}: {station_id} 访问次数: {old_count} → {self.visit_count[station_id]}")
         
     def start_inspection(self, timestamp: float):
         """开始质量检测"""
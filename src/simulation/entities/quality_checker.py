@@ -1,14 +1,15 @@
 # src/simulation/entities/quality_checker.py
 import simpy
-import random
 import logging
+import numpy as np
 from typing import Dict, Tuple, Optional
 from enum import Enum
 
-from config.schemas import DeviceStatus, StationStatus
+from config.schemas import DeviceStatus
 from src.simulation.entities.station import Station
 from src.simulation.entities.product import Product, QualityStatus
 from src.utils.topic_manager import TopicManager
+from src.utils.mqtt_client import dumps_payload, STATUS_QOS
 
 class SimpleDecision(Enum):
     """简化的质量检测决策"""
@@ -27,6 +28,8 @@ class QualityChecker(Station):
     4. 增加output_buffer，满时阻塞并告警
     """
     
+    DEFAULT_PROCESSING_TIME = (10, 15)
+
     def __init__(
         self,
         env: simpy.Environment,
@@ -41,7 +44,9 @@ class QualityChecker(Station):
         mqtt_client=None,
         interacting_points: list = [],
         topic_manager: Optional[TopicManager] = None,
-        line_id: Optional[str] = None
+        line_id: Optional[str] = None,
+        status_publish_interval: float = 0.0,
+        rng: Optional[np.random.Generator] = None
     ):
         # 默认检测时间
         if processing_times is None:
@@ -58,7 +63,7 @@ class QualityChecker(Station):
         self.output_buffer_capacity = output_buffer_capacity
         self.output_buffer = simpy.Store(env, capacity=output_buffer_capacity)
         
-        super().__init__(env, id, position, logger, topic_manager=topic_manager, line_id=line_id, buffer_size=buffer_size, processing_times=processing_times, downstream_conveyor=None, mqtt_client=mqtt_client, interacting_points=interacting_points)
+        super().__init__(env, id, position, logger, topic_manager=topic_manager, line_id=line_id, buffer_size=buffer_size, processing_times=processing_times, downstream_conveyor=None, mqtt_client=mqtt_client, interacting_points=interacting_points, status_publish_interval=status_publish_interval, rng=rng)
         
         # 简单统计
         self.stats = {
@@ -71,30 +76,28 @@ class QualityChecker(Station):
             "working_time": 0.0,  # Total time spent in PROCESSING status
             "start_time": env.now  # Track when station started
         }
+        # get_simple_stats()的比率缓存，以(检测数, 合格数, 报废数, 返工数)为键，计数变化时才重新计算
+        self._simple_rates_key = None
+        self._simple_rates = (0, 0, 0)
         
         # self.logger.info(f"🔍 Simple quality checker ready (pass≥{self.pass_threshold}%, scrap≤{self.scrap_threshold}%)")
         # The run process is already started by the parent Station class
         
-    def publish_status(self, message: Optional[str] = None):
+    def _publish_status_now(self, message: Optional[str] = None):
         """Publishes the current status of the station to MQTT."""
         if not self.mqtt_client or not self.mqtt_client.is_connected():
             return
             
-        status_data = StationStatus(
-            timestamp=self.env.now,
-            source_id=self.id,
-            status=self.status,
-            buffer=[p.id for p in self.buffer.items],
-            stats=self.stats,
-            output_buffer=[p.id for p in self.output_buffer.items],
-            message=message,
-        )
-        if self.topic_manager and self.line_id:
-            topic = self.topic_manager.get_station_status_topic(self.line_id, self.id)
-        else:
-            from config.topics import get_station_status_topic
-            topic = get_station_status_topic(self.id)
-        self.mqtt_client.publish(topic, status_data.model_dump_json(), retain=False)
+        status_data = {
+            "timestamp": float(self.env.now),
+            "source_id": self.id,
+            "status": self.status.value,
+            "message": message,
+            "buffer": [p.id for p in self.buffer.items],
+            "stats": self.stats,
+            "output_buffer": [p.id for p in self.output_buffer.items],
+        }
+        self._mqtt_publish(self._status_topic, dumps_payload(status_data), qos=STATUS_QOS, retain=False)
 
     def process_product(self, product: Product):
         """
@@ -114,8 +117,8 @@ class QualityChecker(Station):
             self.publish_status()
 
             # Record processing start and get processing time
-            min_time, max_time = self.processing_times.get(product.product_type, (10, 15))
-            processing_time = random.uniform(min_time, max_time)
+            min_time, max_time = self._get_processing_time_range(product)
+            processing_time = self._sample_processing_time(min_time, max_time)
             
             # Apply efficiency and fault impacts
             efficiency_factor = getattr(self.performance_metrics, 'efficiency_rate', 100.0) / 100.0
@@ -149,7 +152,7 @@ class QualityChecker(Station):
             self.publish_status(msg)
             
             # Execute decision (equivalent to transfer_product_to_next_stage)
-            yield self.env.process(self._execute_quality_decision(product, decision))
+            yield from self._execute_quality_decision(product, decision)
 
         except simpy.Interrupt as e:
             self.logger.warning(f"⚠️ {self.id}: Inspection of product {product.id} was interrupted: {e.cause}")
@@ -158,7 +161,7 @@ class QualityChecker(Station):
                 # 产品已取出，说明检测时间已经完成，应该继续流转
                 self.logger.info(f"🚚 {self.id}: 产品 {product.id} 已检测完成，继续流转")
                 decision = self._make_simple_decision(product)
-                yield self.env.process(self._execute_quality_decision(product, decision))
+                yield from self._execute_quality_decision(product, decision)
             else:
                 # 产品还在buffer中，说明在timeout期间被中断，等待下次处理
                 self.logger.info(f"⏸️  {self.id}: 产品 {product.id} 检测被中断，留在buffer中")
@@ -199,7 +202,7 @@ class QualityChecker(Station):
             if hasattr(self, 'kpi_calculator') and self.kpi_calculator:
                 self.kpi_calculator.complete_order_item(product.order_id, product.product_type, passed_quality=False)
             
-            yield self.env.process(self._handle_product_scrap(product, "quality_inspection_failed"))
+            yield from self._handle_product_scrap(product, "quality_inspection_failed")
             self.stats["scrapped_count"] += 1
             self.set_status(DeviceStatus.SCRAP)
             msg = f"❌ {self.id}: {product.id} scrapping"
@@ -223,7 +226,7 @@ class QualityChecker(Station):
                 
             else:
                 msg = f"⚠️  {self.id}: can not determine rework station, product scrapped"
-                yield self.env.process(self._handle_product_scrap(product, "rework_failed"))
+                yield from self._handle_product_scrap(product, "rework_failed")
         
         # Set status back to IDLE after the operation is complete
         self.set_status(DeviceStatus.IDLE)
@@ -268,18 +271,32 @@ class QualityChecker(Station):
 
     def get_simple_stats(self) -> Dict:
         """获取简化的统计信息"""
-        total = self.stats["inspected_count"]
+        stats = self.stats
+        total = stats["inspected_count"]
         if total == 0:
             return {"inspected": 0, "pass_rate": 0, "scrap_rate": 0, "rework_rate": 0}
+
+        passed = stats["passed_count"]
+        scrapped = stats["scrapped_count"]
+        reworked = stats["reworked_count"]
+        key = (total, passed, scrapped, reworked)
+        if key != self._simple_rates_key:
+            self._simple_rates_key = key
+            self._simple_rates = (
+                round(passed / total * 100, 1),
+                round(scrapped / total * 100, 1),
+                round(reworked / total * 100, 1),
+            )
+        pass_rate, scrap_rate, rework_rate = self._simple_rates
             
         return {
             "inspected": total,
-            "passed": self.stats["passed_count"],
-            "scrapped": self.stats["scrapped_count"], 
-            "reworked": self.stats["reworked_count"],
-            "pass_rate": round(self.stats["passed_count"] / total * 100, 1),
-            "scrap_rate": round(self.stats["scrapped_count"] / total * 100, 1),
-            "rework_rate": round(self.stats["reworked_count"] / total * 100, 1),
+            "passed": passed,
+            "scrapped": scrapped, 
+            "reworked": reworked,
+            "pass_rate": pass_rate,
+            "scrap_rate": scrap_rate,
+            "rework_rate": rework_rate,
             "buffer_level": self.get_buffer_level()
         }
 
@@ -311,8 +328,8 @@ class QualityChecker(Station):
             msg = f"Product {product.id} taken from {self.id} output_buffer by AGV"
         else:
             # 从输入 buffer 取货，需要检查是否正在处理
-            if len(self.buffer.items) > 0 and self.current_product_id == self.buffer.items[0].id:
-                raise ValueError(f"Product {self.current_product_id} is currently being processed and cannot be taken")
+            if len(self.buffer.items) > 0 and self.proc.product_id == self.buffer.items[0].id:
+                raise ValueError(f"Product {self.proc.product_id} is currently being processed and cannot be taken")
             
             product = yield self.buffer.get()
             msg = f"Product {product.id} taken from {self.id} input buffer by AGV"
@@ -2,15 +2,47 @@
 import simpy
 import random
 import logging
+import numpy as np
 from typing import Dict, Tuple, Optional, Callable
 
-from config.schemas import DeviceStatus, StationStatus
-from src.simulation.entities.base import Device
-from src.simulation.entities.product import Product
+from config.schemas import DeviceStatus
+from src.simulation.entities.base import CoalescedStatusPublisher, Device
+from src.simulation.entities.product import Product, PRODUCT_TYPES
 from src.utils.topic_manager import TopicManager
+from src.utils.mqtt_client import dumps_payload, STATUS_QOS
 from config.topics import get_station_status_topic
 
-class Station(Device):
+# 每次预生成的均匀分布随机数个数
+_RAND_POOL_SIZE = 1024
+
+class _StationBuffer(simpy.Store):
+    """simpy.Store，产品放入时触发item_added事件，run循环可以等待产品到达而不把产品取出"""
+
+    def __init__(self, env: simpy.Environment, capacity: int):
+        super().__init__(env, capacity=capacity)
+        self.item_added = env.event()
+
+    def _do_put(self, event):
+        result = super()._do_put(event)
+        if event.triggered:
+            self.item_added.succeed()
+            self.item_added = self._env.event()
+        return result
+
+class _ProcState:
+    """工站当前产品的处理时间记录（站点一次只处理一个产品），用于故障中断后恢复处理"""
+    __slots__ = ("product_id", "start_time", "total_time", "elapsed_time")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.product_id = None  # 当前正在处理的产品ID
+        self.start_time = None  # 当前产品开始处理的时间
+        self.total_time = None  # 当前产品需要的总处理时间
+        self.elapsed_time = None  # 中断前已经处理的累计时间
+
+class Station(CoalescedStatusPublisher, Device):
     """
     Represents a manufacturing station in the factory.
 
@@ -24,14 +56,18 @@ class Station(Device):
             to a tuple of (min_time, max_time) for processing.
         product_transfer_callback (Callable): Callback function to transfer products to next station
         downstream_conveyor (Conveyor): The conveyor downstream from this station
+        status_publish_interval (float): Status updates requested within this window
+            (simulation seconds) are coalesced into a single MQTT message. 0 merges
+            updates issued at the same simulation instant.
 
         # For fault system to record the current product for resume processing
-        current_product_id (str): The ID of the current product being processed.
-        current_product_start_time (float): The time when the current product started processing.
-        current_product_total_time (float): The total time required to process the current product.
-        current_product_elapsed_time (float): The elapsed time before the current product was interrupted.
+        proc (_ProcState): Processing record of the current product (product_id, start_time,
+            total_time, elapsed_time before interruption).
     """
     
+    # 未配置加工时间的产品类型使用的默认(min_time, max_time)
+    DEFAULT_PROCESSING_TIME = (10, 20)
+
     def __init__(
         self,
         env: simpy.Environment,
@@ -45,15 +81,25 @@ class Station(Device):
         interacting_points: list = [],
         kpi_calculator=None,  # Injected dependency
         topic_manager: Optional[TopicManager] = None,
-        line_id: Optional[str] = None
+        line_id: Optional[str] = None,
+        status_publish_interval: float = 0.0,
+        rng: Optional[np.random.Generator] = None
     ):
         super().__init__(env, id, position, device_type="station", mqtt_client=mqtt_client, interacting_points=interacting_points)
         self.logger = logger
         self.topic_manager = topic_manager
         self.line_id = line_id
         self.buffer_size = buffer_size
-        self.buffer = simpy.Store(env, capacity=buffer_size)
+        self.buffer = _StationBuffer(env, capacity=buffer_size)
         self.processing_times = processing_times
+        # 按产品类型下标预先展开的加工时间表，避免每个产品都做字符串字典查找
+        self._pt_min = [processing_times.get(t, self.DEFAULT_PROCESSING_TIME)[0] for t in PRODUCT_TYPES]
+        self._pt_max = [processing_times.get(t, self.DEFAULT_PROCESSING_TIME)[1] for t in PRODUCT_TYPES]
+        # 加工时间随机数池：批量预生成[0,1)均匀分布样本，按需取用
+        # 未指定rng时从全局random取种子，保证random.seed()仍能复现仿真结果
+        self._rng = rng if rng is not None else np.random.default_rng(random.getrandbits(64))
+        self._rand_pool = self._rng.random(_RAND_POOL_SIZE).tolist()
+        self._rand_idx = 0
         
         # 统计数据
         self.stats = {
@@ -63,15 +109,23 @@ class Station(Device):
             "working_time": 0.0,  # Total time spent in PROCESSING status
             "start_time": env.now  # Track when station started
         }
+        # get_processing_stats()返回的缓存视图，调用时原地刷新
+        self._stats_view: Dict = {}
         
         self.downstream_conveyor = downstream_conveyor
         self.kpi_calculator = kpi_calculator
         self.last_status_change_time = env.now
         # 产品处理时间跟踪（站点一次只处理一个产品）
-        self.current_product_id = None  # 当前正在处理的产品ID
-        self.current_product_start_time = None  # 当前产品开始处理的时间
-        self.current_product_total_time = None  # 当前产品需要的总处理时间
-        self.current_product_elapsed_time = None  # 中断前已经处理的累计时间
+        self.proc = _ProcState()
+        # 设备恢复可操作状态时触发，替代轮询等待
+        self._ready_event = env.event()
+        self._init_status_coalescing(status_publish_interval)
+        # 状态主题和发布方法在设备生命周期内不变，初始化时计算一次
+        if topic_manager and line_id:
+            self._status_topic = topic_manager.get_station_status_topic(line_id, id)
+        else:
+            self._status_topic = get_station_status_topic(id)
+        self._mqtt_publish = mqtt_client.publish if mqtt_client else None
         
         # Start the main operational process for the station
         self.env.process(self.run())
@@ -79,13 +133,18 @@ class Station(Device):
         # Publish initial status
         self.publish_status("Station initialized")
 
+    @property
+    def current_product_id(self) -> Optional[str]:
+        """ID of the product currently being processed (kept for compatibility)."""
+        return self.proc.product_id
+
     def set_status(self, new_status: DeviceStatus, message: Optional[str] = None):
         """Overrides the base method to publish status on change."""
         if self.status == new_status:
             return
         
         # Track working time for KPI
-        if self.status == DeviceStatus.PROCESSING:
+        if self.status is DeviceStatus.PROCESSING:
             processing_duration = self.env.now - self.last_status_change_time
             self.stats["working_time"] += processing_duration
             
@@ -96,39 +155,51 @@ class Station(Device):
         
         self.last_status_change_time = self.env.now
         super().set_status(new_status, message)
+        self._signal_ready()
+
+    def _signal_ready(self):
+        """设备进入可操作状态时唤醒等待中的run循环"""
+        if self.can_operate():
+            self._ready_event.succeed()
+            self._ready_event = self.env.event()
 
-    def publish_status(self, message: Optional[str] = None):
+    def _needs_immediate_flush(self) -> bool:
+        # 故障发生和恢复时立即发布，不等待合并窗口
+        return self.status is DeviceStatus.FAULT or self._last_published_status is DeviceStatus.FAULT
+
+    def _publish_status_now(self, message: Optional[str] = None):
         """Publishes the current status of the station to MQTT."""
         if not self.mqtt_client or not self.mqtt_client.is_connected():
             return
             
-        status_data = StationStatus(
-            timestamp=self.env.now,
-            source_id=self.id,
-            status=self.status,
-            message=message,
-            buffer=[p.id for p in self.buffer.items],
-            stats=self.stats,
-            output_buffer=[]  # 普通工站没有 output_buffer
-        )
-        if self.topic_manager and self.line_id:
-            topic = self.topic_manager.get_station_status_topic(self.line_id, self.id)
-        else:
-            topic = get_station_status_topic(self.id)
-        self.mqtt_client.publish(topic, status_data.model_dump_json(), retain=False)
+        # 字段与StationStatus一致，数据本身已合法，直接序列化字典以跳过Pydantic校验
+        status_data = {
+            "timestamp": float(self.env.now),
+            "source_id": self.id,
+            "status": self.status.value,
+            "message": message,
+            "buffer": [p.id for p in self.buffer.items],
+            "stats": self.stats,
+            "output_buffer": []  # 普通工站没有 output_buffer
+        }
+        self._mqtt_publish(self._status_topic, dumps_payload(status_data), qos=STATUS_QOS, retain=False)
 
     def run(self):
         """The main operational loop for the station."""
         while True:
             try:
-                # 等待设备可操作且buffer有产品
-                yield self.env.process(self._wait_for_ready_state())
+                # 等待设备可操作
+                yield from self._wait_for_ready_state()
                 
-                # 如果能到这里，说明设备可操作且有产品
-                if len(self.buffer.items) > 0:
-                    product = self.buffer.items[0]
-                    self.action = self.env.process(self.process_product(product))
-                    yield self.action
+                # buffer为空时等待产品放入，醒来后重新检查设备状态
+                if not self.buffer.items:
+                    yield self.buffer.item_added
+                    continue
+
+                # 产品留在buffer中直到加工完成，保证加工中的产品仍占用buffer容量
+                product = self.buffer.items[0]
+                self.action = self.env.process(self.process_product(product))
+                yield self.action
                     
             except simpy.Interrupt:
                 # 被中断（通常是故障），继续循环
@@ -136,20 +207,9 @@ class Station(Device):
                 continue
     
     def _wait_for_ready_state(self):
-        """等待设备处于可操作状态且buffer有产品"""
-        while True:
-            # 如果buffer为空，等待
-            if len(self.buffer.items) == 0:
-                yield self.env.timeout(0.1)
-                continue
-
-            # 如果设备不可操作，等待
-            if not self.can_operate():
-                yield self.env.timeout(1)
-                continue
-
-            # 设备可操作且有产品，返回
-            return
+        """等待设备处于可操作状态（由set_status触发的事件唤醒）"""
+        while not self.can_operate():
+            yield self._ready_event
 
     def process_product(self, product: Product):
         """
@@ -157,11 +217,15 @@ class Station(Device):
         from waiting for it to processing and transferring it.
         Includes robust error handling for interruptions.
         """
-        self.logger.debug(f"process_product started for {product.id}, buffer={len(self.buffer.items)}/{self.buffer.capacity}")
+        env = self.env
+        proc = self.proc
+        buf_items = self.buffer.items
+        pid = self.id
+        self.logger.debug(f"process_product started for {product.id}, buffer={len(buf_items)}/{self.buffer.capacity}")
         try:
             # Check if the device can operate
             if not self.can_operate():
-                msg = f"⚠️  {self.id}: can not process product, device is not available"
+                msg = f"⚠️  {pid}: can not process product, device is not available"
                 self.logger.warning(msg)
                 self.publish_status(msg)
                 return
@@ -170,92 +234,100 @@ class Station(Device):
             self.publish_status()
 
             # Record processing start and get processing time
-            min_time, max_time = self.processing_times.get(product.product_type, (10, 20))
-            processing_time = random.uniform(min_time, max_time)
+            min_time, max_time = self._get_processing_time_range(product)
+            processing_time = self._sample_processing_time(min_time, max_time)
             
-            # 处理中断恢复的逻辑
-            if (self.current_product_id == product.id and 
-                self.current_product_elapsed_time is not None and
-                self.current_product_total_time is not None):
+            # 处理中断恢复的逻辑（product_id只在开始处理时与elapsed_time/total_time一起设置，reset时一起清空）
+            if proc.product_id == product.id:
                 # 恢复处理：使用之前记录的已处理时间
-                elapsed_time = self.current_product_elapsed_time
-                remaining_time = max(0, self.current_product_total_time - elapsed_time)
-                msg = f"{self.id}: {product.id} resume processing, elapsed {elapsed_time:.1f}s, remaining {remaining_time:.1f}s"
+                elapsed_time = proc.elapsed_time
+                remaining_time = max(0, proc.total_time - elapsed_time)
+                msg = f"{pid}: {product.id} resume processing, elapsed {elapsed_time:.1f}s, remaining {remaining_time:.1f}s"
                 self.logger.info(msg)
                 self.publish_status(msg)
                 # 重新记录开始时间，但保留累计时间和总时间
-                self.current_product_start_time = self.env.now
+                proc.start_time = env.now
             else:
                 # 第一次开始处理
-                self.current_product_id = product.id
-                self.current_product_start_time = self.env.now
-                self.current_product_total_time = processing_time
-                self.current_product_elapsed_time = 0  # 初始化累计时间
+                proc.product_id = product.id
+                proc.start_time = env.now
+                proc.total_time = processing_time
+                proc.elapsed_time = 0  # 初始化累计时间
                 remaining_time = processing_time
-                msg = f"{self.id}: {product.id} start processing, need {processing_time:.1f}s"
+                msg = f"{pid}: {product.id} start processing, need {processing_time:.1f}s"
                 self.logger.info(msg)
                 self.publish_status(msg)
                 
                 # Mark production start for KPI tracking (only for StationA)
-                if self.id == "StationA" and self.kpi_calculator:
+                if pid == "StationA" and self.kpi_calculator:
                     self.kpi_calculator.mark_production_start(product)
             
             # The actual processing work
-            yield self.env.timeout(remaining_time)
+            yield env.timeout(remaining_time)
             product = yield self.buffer.get()
-            product.process_at_station(self.id, self.env.now)
+            product.process_at_station(pid, env.now)
 
             # Update statistics upon successful completion
-            self.stats["products_processed"] += 1
-            self.stats["total_processing_time"] += processing_time
-            self.stats["average_processing_time"] = (
-                self.stats["total_processing_time"] / self.stats["products_processed"]
+            stats = self.stats
+            stats["products_processed"] += 1
+            stats["total_processing_time"] += processing_time
+            stats["average_processing_time"] = (
+                stats["total_processing_time"] / stats["products_processed"]
             )
             
             # Processing finished successfully
-            msg = f"{self.id}: {product.id} finished processing, actual processing time {processing_time:.1f}s"
+            msg = f"{pid}: {product.id} finished processing, actual processing time {processing_time:.1f}s"
             self.logger.info(msg)
             self.publish_status(msg)
             
             # Trigger moving the product to the next stage
-            yield self.env.process(self._transfer_product_to_next_stage(product))
+            yield from self._transfer_product_to_next_stage(product)
 
         except simpy.Interrupt as e:
             message = f"Processing of product {product.id} was interrupted: {e.cause}"
-            self.logger.warning(f"⚠️ {self.id}: {message}")
+            self.logger.warning(f"⚠️ {pid}: {message}")
             
             # 记录中断时已经处理的时间
-            if self.current_product_start_time is not None:
-                elapsed_before_interrupt = self.env.now - self.current_product_start_time
-                self.current_product_elapsed_time = (self.current_product_elapsed_time or 0) + elapsed_before_interrupt
-                self.logger.debug(f"💾 {self.id}: 产品 {product.id} 中断前已处理 {elapsed_before_interrupt:.1f}s，累计 {self.current_product_elapsed_time:.1f}s")
+            if proc.start_time is not None:
+                elapsed_before_interrupt = env.now - proc.start_time
+                proc.elapsed_time = (proc.elapsed_time or 0) + elapsed_before_interrupt
+                self.logger.debug(f"💾 {pid}: 产品 {product.id} 中断前已处理 {elapsed_before_interrupt:.1f}s，累计 {proc.elapsed_time:.1f}s")
                 # 清理开始时间，但保留其他记录
-                self.current_product_start_time = None
+                proc.start_time = None
             
-            if product not in self.buffer.items:
+            if product not in buf_items:
                 # 产品已取出，说明处理时间已经完成，应该继续流转，但需要等待设备可操作防止覆盖Fault状态
-                self.logger.debug(f"🚚 {self.id}: 产品 {product.id} 已处理完成，继续流转到下游")
-                while not self.can_operate():
-                    yield self.env.timeout(1)
-                yield self.env.process(self._transfer_product_to_next_stage(product))
+                self.logger.debug(f"🚚 {pid}: 产品 {product.id} 已处理完成，继续流转到下游")
+                yield from self._wait_for_ready_state()
+                yield from self._transfer_product_to_next_stage(product)
                 # 清理所有时间记录
-                self.current_product_id = None
-                self.current_product_start_time = None
-                self.current_product_total_time = None
-                self.current_product_elapsed_time = None
+                proc.reset()
             else:
                 # 产品还在buffer中，说明在timeout期间被中断，等待下次处理
-                self.logger.debug(f"⏸️  {self.id}: 产品 {product.id} 处理被中断，留在buffer中")
+                self.logger.debug(f"⏸️  {pid}: 产品 {product.id} 处理被中断，留在buffer中")
         finally:
             # Clear the action handle once the process is complete or interrupted
             self.action = None
             # 如果产品成功完成处理并转移，清理时间记录
-            if self.current_product_id == product.id and product not in self.buffer.items:
-                self.current_product_id = None
-                self.current_product_start_time = None
-                self.current_product_total_time = None
-                self.current_product_elapsed_time = None
-        self.logger.debug(f"process_product finished for {product.id}, buffer={len(self.buffer.items)}/{self.buffer.capacity}")
+            if proc.product_id == product.id and product not in buf_items:
+                proc.reset()
+        self.logger.debug(f"process_product finished for {product.id}, buffer={len(buf_items)}/{self.buffer.capacity}")
+
+    def _get_processing_time_range(self, product: Product) -> Tuple[float, float]:
+        """返回该产品类型的(min_time, max_time)加工时间范围"""
+        i = product.type_idx
+        if i >= 0:
+            return self._pt_min[i], self._pt_max[i]
+        return self.processing_times.get(product.product_type, self.DEFAULT_PROCESSING_TIME)
+
+    def _sample_processing_time(self, min_time: float, max_time: float) -> float:
+        """从随机数池中取样，得到[min_time, max_time]内均匀分布的加工时间"""
+        u = self._rand_pool[self._rand_idx]
+        self._rand_idx += 1
+        if self._rand_idx == _RAND_POOL_SIZE:
+            self._rand_pool = self._rng.random(_RAND_POOL_SIZE).tolist()
+            self._rand_idx = 0
+        return min_time + (max_time - min_time) * u
 
     def _transfer_product_to_next_stage(self, product):
         """Transfer the processed product to the next station or conveyor."""
@@ -269,8 +341,7 @@ class Station(Device):
             self.publish_status("downstream conveyor is full or run into some issue, station is blocked")
 
         # TODO: while len(self.downstream_conveyor.buffer.items) >0 //取决于下游堵塞但是没东西时要不要放1个（之前有空位就会放）
-        while not self.downstream_conveyor.can_operate() or self.downstream_conveyor.is_full():
-            yield self.env.timeout(0.1)
+        yield from self.downstream_conveyor.wait_until_ready()
 
         yield self.downstream_conveyor.push(product)
         
@@ -284,8 +355,8 @@ class Station(Device):
         Ensures that the product being processed cannot be taken.
         """
         # 检查第一个产品是否正在被处理
-        if len(self.buffer.items) > 0 and self.current_product_id == self.buffer.items[0].id:
-            raise ValueError(f"Product {self.current_product_id} is currently being processed and cannot be taken")
+        if len(self.buffer.items) > 0 and self.proc.product_id == self.buffer.items[0].id:
+            raise ValueError(f"Product {self.proc.product_id} is currently being processed and cannot be taken")
         
         # 取出第一个产品
         product = yield self.buffer.get()
@@ -324,13 +395,18 @@ class Station(Device):
         return len(self.buffer.items) == 0
     
     def get_processing_stats(self) -> Dict:
-        """获取工站处理统计信息"""
-        return {
-            **self.stats,
-            "buffer_level": self.get_buffer_level(),
-            "buffer_utilization": self.get_buffer_level() / self.buffer_size,
-            "can_operate": self.can_operate()
-        }
+        """
+        获取工站处理统计信息。
+        返回的是原地刷新的缓存字典，频繁轮询时不再每次分配新dict；
+        调用方如需保存快照请自行copy。
+        """
+        view = self._stats_view
+        view.update(self.stats)
+        buffer_level = len(self.buffer.items)
+        view["buffer_level"] = buffer_level
+        view["buffer_utilization"] = buffer_level / self.buffer_size
+        view["can_operate"] = self.can_operate()
+        return view
 
     def reset_stats(self):
         """重置统计数据"""
@@ -343,17 +419,14 @@ class Station(Device):
     def recover(self):
         """Custom recovery logic for the station."""
         # 清理不在buffer中的产品的时间记录
-        if self.current_product_id:
+        if self.proc.product_id:
             products_in_buffer = {p.id for p in self.buffer.items}
-            if self.current_product_id not in products_in_buffer:
-                self.logger.debug(f"🗑️ Station {self.id}: 清理过期产品 {self.current_product_id} 的时间记录")
-                self.current_product_id = None
-                self.current_product_start_time = None
-                self.current_product_total_time = None
-                self.current_product_elapsed_time = None
+            if self.proc.product_id not in products_in_buffer:
+                self.logger.debug(f"🗑️ Station {self.id}: 清理过期产品 {self.proc.product_id} 的时间记录")
+                self.proc.reset()
         
         # 只有当设备处于FAULT状态时才恢复
-        if self.status == DeviceStatus.FAULT:
+        if self.status is DeviceStatus.FAULT:
             self.set_status(DeviceStatus.IDLE)
             msg = f"✅ Station {self.id} is recovered."
             self.logger.info(msg)
@@ -362,4 +435,3 @@ class Station(Device):
             # 如果设备不是FAULT状态，只打印恢复尝试的信息
             msg = f"ℹ️ Station {self.id}: Recovery attempted, but status is {self.status.value}, not changing."
             self.logger.info(msg)
-
@@ -2,15 +2,15 @@
 import simpy
 import random
 import logging
-from typing import Dict, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 
-from src.simulation.entities.base import Device
+from src.simulation.entities.base import CoalescedStatusPublisher, Device
 from src.simulation.entities.product import Product
-from config.schemas import WarehouseStatus
 from config.topics import get_warehouse_status_topic
 from src.utils.topic_manager import TopicManager
+from src.utils.mqtt_client import dumps_payload, STATUS_QOS
 
-class BaseWarehouse(Device):
+class BaseWarehouse(CoalescedStatusPublisher, Device):
     """Base class for all warehouse types, inheriting from Device."""
 
     def __init__(
@@ -23,6 +23,7 @@ class BaseWarehouse(Device):
         interacting_points: list = [],
         topic_manager: Optional[TopicManager] = None,
         line_id: Optional[str] = None,
+        status_publish_interval: float = 0.0,
         **kwargs # Absorb other config values
     ):
         super().__init__(env, id, position, device_type="warehouse", mqtt_client=mqtt_client)
@@ -32,23 +33,49 @@ class BaseWarehouse(Device):
         self.stats = {}  # To be overridden by subclasses
         self.topic_manager = topic_manager
         self.line_id = line_id
+        # 状态主题和发布方法在设备生命周期内不变，初始化时计算一次
+        if topic_manager:
+            self._status_topic = topic_manager.get_warehouse_status_topic(id)
+        else:
+            self._status_topic = get_warehouse_status_topic(id)
+        self._mqtt_publish = mqtt_client.publish if mqtt_client else None
+        # product_id -> product 索引，按id取货时无需线性扫描buffer
+        self._by_id: Dict[str, Product] = {}
+        # 与buffer顺序一致的产品id列表，随放入/取出增量维护，发布状态时直接使用
+        self._buffer_ids: List[str] = []
+        self._init_status_coalescing(status_publish_interval)
 
     def publish_status(self, message: str = "Warehouse is ready"):
+        """Requests a coalesced status publish (see CoalescedStatusPublisher)."""
+        super().publish_status(message)
+
+    def _publish_status_now(self, message: str):
         """Publishes the current status of the warehouse to MQTT."""
         if not self.mqtt_client or not self.mqtt_client.is_connected():
             return
-        status_data = WarehouseStatus(
-            timestamp=self.env.now,
-            source_id=self.id,
-            message=message,
-            buffer=[p.id for p in self.buffer.items],
-            stats=self.stats
-        )
-        if self.topic_manager:
-            topic = self.topic_manager.get_warehouse_status_topic(self.id)
-        else:
-            topic = get_warehouse_status_topic(self.id)
-        self.mqtt_client.publish(topic, status_data.model_dump_json(), retain=False)
+        # 字段与WarehouseStatus一致，直接序列化字典以跳过Pydantic校验
+        status_data = {
+            "timestamp": float(self.env.now),
+            "source_id": self.id,
+            "message": message,
+            "buffer": self._buffer_ids,
+            "stats": self.stats
+        }
+        self._mqtt_publish(self._status_topic, dumps_payload(status_data), qos=STATUS_QOS, retain=False)
+
+    def _index_product(self, product: Product):
+        """登记产品的id索引和id列表"""
+        self._by_id[product.id] = product
+        self._buffer_ids.append(product.id)
+
+    def _append_product(self, product: Product):
+        """
+        buffer容量无限时的快速放入：直接追加到items，不创建Put事件，
+        再唤醒可能在等待的get请求。
+        """
+        self._index_product(product)
+        self.buffer.items.append(product)
+        self.buffer._trigger_get(None)
 
     def get_buffer_level(self) -> int:
         """Return the current number of items in the buffer."""
@@ -61,17 +88,18 @@ class BaseWarehouse(Device):
         Otherwise, remove the first product in the buffer.
         """
         if product_id:
-            # Try to find and remove the product with the specified id
-            for idx, p in enumerate(self.buffer.items):
-                if p.id == product_id:
-                    product = self.buffer.items.pop(idx)
-                    self.logger.debug(f"📤 Product {product.id} taken from warehouse buffer.")
-                    break
-            else:
+            # Look up the product with the specified id via the index
+            product = self._by_id.pop(product_id, None)
+            if product is None:
                 # If not found, raise an error
                 raise ValueError(f"Product with id {product_id} not found in warehouse buffer.")
+            self.buffer.items.remove(product)
+            self._buffer_ids.remove(product_id)
+            self.logger.debug(f"📤 Product {product.id} taken from warehouse buffer.")
         else:
             product = yield self.buffer.get()
+            self._by_id.pop(product.id, None)
+            self._buffer_ids.remove(product.id)
             self.logger.debug(f"📤 Default Product taken from warehouse buffer.")
 
         # 发布状态更新
@@ -80,11 +108,6 @@ class BaseWarehouse(Device):
         self.publish_status(msg)
         return product
 
-    def run(self):
-        """Warehouses don't process products, just idle loop."""
-        while True:
-            yield self.env.timeout(60)  # Check every minute
-
 class RawMaterial(BaseWarehouse):
     """Raw material warehouse - the starting point of the production line"""
 
@@ -102,6 +125,8 @@ class RawMaterial(BaseWarehouse):
             "total_materials_supplied": 0,
             "product_type_summary": {"P1": 0, "P2": 0, "P3": 0}
         }
+        # 直接持有按产品类型计数的字典，计数时省去外层stats查找
+        self._type_summary = self.stats["product_type_summary"]
         # self.logger.info(f"🏭 {self.id}: Raw material warehouse is ready")
         self.publish_status("Raw material warehouse is ready")
 
@@ -109,10 +134,10 @@ class RawMaterial(BaseWarehouse):
         """Create raw material product"""
         product = Product(product_type, order_id)
         self.stats["total_materials_supplied"] += 1
-        self.stats["product_type_summary"][product_type] += 1
+        self._type_summary[product_type] += 1
         product.add_history(self.env.now, f"Raw material created at {self.id}")
         self.logger.info(f"🔧 {self.id}: Create raw material {product.id} (type: {product_type})")
-        self.buffer.put(product)
+        self._append_product(product)
         self.publish_status(f"Supply raw material {product.id} (type: {product_type}) since order {order_id} is created")
         return product
 
@@ -161,15 +186,20 @@ class Warehouse(BaseWarehouse):
             "total_products_received": 0,
             "product_type_summary": {"P1": 0, "P2": 0, "P3": 0},
         }
+        # 直接持有按产品类型计数的字典，计数时省去外层stats查找
+        self._type_summary = self.stats["product_type_summary"]
         # self.logger.info(f"🏪 {self.id}: Final product warehouse is ready")
         self.publish_status("Warehouse is ready")
 
-    def add_product_to_buffer(self, product: Product):
-        """AGV put product to warehouse"""
-        yield self.buffer.put(product)
+    def add_product_to_buffer(self, product: Product) -> bool:
+        """
+        AGV put product to warehouse.
+        成品仓库容量无限，放入不会阻塞，因此是普通方法而非SimPy进程。
+        """
+        self._append_product(product)
         self.publish_status(f"Store finished product {product.id} (type: {product.product_type})")
         self.stats["total_products_received"] += 1
-        self.stats["product_type_summary"][product.product_type] += 1
+        self._type_summary[product.product_type] += 1
         product.add_history(self.env.now, f"Stored in warehouse {self.id}")
         self.logger.info(f"📦 {self.id}: Store finished product {product.id} (type: {product.product_type})")
         return True
@@ -1,9 +1,14 @@
 # src/simulation/factory.py
 import simpy
+import copy
+import json
+import heapq
+import time
 import random
-from typing import Dict, List, Tuple, Optional
+import logging
+from typing import Callable, Dict, List, Tuple, Optional
 
-from src.simulation.entities.conveyor import Conveyor, TripleBufferConveyor
+from src.simulation.entities.conveyor import Conveyor, TripleBufferConveyor, wire_conveyors
 from src.simulation.entities.base import BaseConveyor
 from src.simulation.entities.warehouse import Warehouse, RawMaterial
 from src.simulation.entities.station import Station
@@ -13,10 +18,26 @@ from src.game_logic.order_generator import OrderGenerator
 from src.game_logic.fault_system import FaultSystem
 from src.game_logic.kpi_calculator import KPICalculator
 from src.utils.mqtt_client import MQTTClient
+from config.schemas import DeviceStatus
+from config.topics import FACTORY_STATUS_TOPIC
 
 # Import configuration loader
 from src.utils.config_loader import load_factory_config
 
+logger = logging.getLogger(__name__)
+
+# 性能计时开关：关闭时周期任务与批量发布不做任何计时记录
+_PROFILE = False
+
+# 按设备id选择实现类；未列出的工站均为普通Station
+_STATION_CLASSES = {"QualityCheck": QualityChecker}
+# 传送带id -> (实现类, 需要从配置读取的容量参数)
+_CONVEYOR_CLASSES = {
+    "Conveyor_AB": (Conveyor, ("capacity",)),
+    "Conveyor_BC": (Conveyor, ("capacity",)),
+    "Conveyor_CQ": (TripleBufferConveyor, ("main_capacity", "upper_capacity", "lower_capacity")),
+}
+
 class Factory:
     """
     The main class that orchestrates the entire factory simulation.
@@ -47,6 +68,13 @@ class Factory:
         
         # Initialize all_devices dictionary first
         self.all_devices = {}
+        # device_id -> (仿真时间, 设备状态, 状态字典)，同一仿真时刻且设备状态未变时直接复用
+        self._status_cache: Dict[str, Tuple[float, DeviceStatus, Dict]] = {}
+        # 同一仿真时刻排队的MQTT消息，在该时刻末尾一次性批量发布
+        self._pending_publishes: List[Tuple[str, object]] = []
+        self._flush_event: Optional[simpy.Event] = None
+        # 周期任务与批量发布的轻量计时（仅_PROFILE开启时记录）：{"<name>_n": 调用次数, "<name>_ns": 累计耗时(ns)}
+        self._prof: Dict[str, int] = {}
 
         # Game logic components will be initialized dynamically
         self.order_generator: Optional[OrderGenerator] = None
@@ -68,6 +96,10 @@ class Factory:
 
         if self.raw_material is not None:
             self.all_devices[self.raw_material.id] = self.raw_material
+
+        # device_id -> 设备类别，get_device_status据此一次查表决定附加字段
+        self._device_kind: Dict[str, str] = {device_id: "station" for device_id in self.stations}
+        self._device_kind.update((device_id, "agv") for device_id in self.agvs)
         
         # Create game logic systems from config
         self._create_game_logic_systems()
@@ -91,35 +123,23 @@ class Factory:
         # Setup event handlers
         self._setup_event_handlers()
         
-        # Start process to update active faults count
-        self.env.process(self._update_active_faults_count())
-        
-        # Start device status publishing
-        self._start_status_publishing()
+        # 故障计数更新与工厂状态发布由同一个调度进程驱动
+        self._start_periodic_tasks()
            
-        self._bind_conveyors_to_stations()
-        self._setup_conveyor_downstreams()
+        wire_conveyors(self.stations, self.conveyors)
 
     def _create_devices(self):
         """Instantiates all devices based on the layout configuration."""
         
         for station_cfg in self.layout['stations']:
-            # Quality checker station
-            if station_cfg['id'] == 'QualityCheck':
-                station = QualityChecker(
-                    env=self.env,
-                    mqtt_client=self.mqtt_client,
-                    **station_cfg
-                )
-                print(f"[{self.env.now:.2f}] 🔍 Created QualityChecker: {station_cfg['id']}")
-            else:
-                # create normal station
-                station = Station(
-                    env=self.env,
-                    mqtt_client=self.mqtt_client,
-                    **station_cfg
-                )
-                print(f"[{self.env.now:.2f}] 🏭 Created Station: {station_cfg['id']}")
+            # Quality checker or normal station, chosen by id
+            station_cls = _STATION_CLASSES.get(station_cfg['id'], Station)
+            station = station_cls(
+                env=self.env,
+                mqtt_client=self.mqtt_client,
+                **station_cfg
+            )
+            print(f"[{self.env.now:.2f}] 🏭 Created {station_cls.__name__}: {station_cfg['id']}")
             
             self.stations[station.id] = station
         
@@ -148,20 +168,13 @@ class Factory:
                 "mqtt_client": self.mqtt_client,
                 "kpi_calculator": self.kpi_calculator
             }
-            if conveyor_id == 'Conveyor_CQ':
-                conveyor = TripleBufferConveyor(
-                    main_capacity=conveyor_cfg['main_capacity'],
-                    upper_capacity=conveyor_cfg['upper_capacity'],
-                    lower_capacity=conveyor_cfg['lower_capacity'],
-                    **common_args
-                )
-            elif conveyor_id in ['Conveyor_AB', 'Conveyor_BC']:
-                conveyor = Conveyor(
-                    capacity=conveyor_cfg['capacity'],
-                    **common_args
-                )
-            else:
+            if conveyor_id not in _CONVEYOR_CLASSES:
                 raise ValueError(f"Unknown conveyor type: {conveyor_id}")
+            conveyor_cls, capacity_keys = _CONVEYOR_CLASSES[conveyor_id]
+            conveyor = conveyor_cls(
+                **{key: conveyor_cfg[key] for key in capacity_keys},
+                **common_args
+            )
             
             self.conveyors[conveyor.id] = conveyor
             print(f"[{self.env.now:.2f}] 🚛 Created Conveyor: {conveyor_id}")
@@ -242,14 +255,23 @@ class Factory:
         Get list of devices that can currently be operated (not frozen).
         """
         if self.fault_system is None:
-            print(f"[{self.env.now:.2f}] 🚫 Fault System is disabled. No available devices from fault system.")
+            logger.warning("[%.2f] 🚫 Fault System is disabled. No available devices from fault system.", self.env.now)
             return []
         return self.fault_system.get_available_devices()
 
     def get_device_status(self, device_id: str) -> Dict:
-        """Get comprehensive device status including faults."""
-        if device_id in self.all_devices:
-            device = self.all_devices[device_id]
+        """
+        Get comprehensive device status including faults.
+        同一仿真时刻内的结果会被缓存，仿真时间推进或设备状态变化后失效；
+        返回的是副本，调用方修改不会影响缓存。
+        """
+        now = self.env.now
+        device = self.all_devices.get(device_id)
+        if device is not None:
+            cached = self._status_cache.get(device_id)
+            if cached is not None and cached[0] == now and cached[1] is device.status:
+                return copy.deepcopy(cached[2])
+
             detailed_status = device.get_detailed_status()
             
             # Convert to simplified status format for compatibility
@@ -265,56 +287,87 @@ class Factory:
             }
             
             # Add device-specific information
-            if device_id in self.stations:
+            kind = self._device_kind.get(device_id)
+            if kind == "station":
                 status_dict.update({
-                    'buffer_level': self.stations[device_id].get_buffer_level(),
+                    'buffer_level': device.get_buffer_level(),
                     'precision_level': detailed_status.precision_level,
                     'tool_wear_level': detailed_status.tool_wear_level
                 })
-            elif device_id in self.agvs:
-                agv = self.agvs[device_id]
+            elif kind == "agv":
                 status_dict.update({
-                    'position': {'x': agv.position[0], 'y': agv.position[1]},
+                    'position': {'x': device.position[0], 'y': device.position[1]},
                     'battery_level': detailed_status.battery_level,
                     'position_accuracy': detailed_status.position_accuracy,
-                    'payload': [p.id for p in agv.payload.items] if hasattr(agv, 'payload') else []
+                    'payload': [p.id for p in device.payload.items] if hasattr(device, 'payload') else []
                 })
             
-            return status_dict
+            self._status_cache[device_id] = (now, device.status, status_dict)
+            return copy.deepcopy(status_dict)
         return {}
 
-    def _start_status_publishing(self):
-        """Start processes to publish device status to MQTT."""        
-        # Start factory overall status publishing
-        self.env.process(self._publish_factory_status())
-    
-    
-    def _publish_factory_status(self):
-        """Publish factory overall status every 30 seconds."""
+    def _start_periodic_tasks(self):
+        """
+        Start one scheduler process for all fixed-interval factory tasks.
+        Each entry is (first_delay, period, handler); handlers are plain methods.
+        """
+        self.env.process(self._run_periodic_tasks([
+            (0.0, 1.0, self._update_active_faults_count),  # Every second, starting now
+            (30.0, 30.0, self._publish_factory_status),    # Every 30 seconds
+        ]))
+
+    def _run_periodic_tasks(self, tasks: List[Tuple[float, float, Callable[[], None]]]):
+        """
+        按下次执行时间的小顶堆调度周期任务，事件堆中始终只有一个等待事件，
+        同一时刻到期的任务在一次唤醒中依次执行。
+        """
+        env = self.env
+        schedule = [(env.now + delay, index, period, handler)
+                    for index, (delay, period, handler) in enumerate(tasks)]
+        heapq.heapify(schedule)
         while True:
-            yield self.env.timeout(30.0)  # Publish every 30 seconds
-            
-            # Create factory status summary
-            from config.topics import FACTORY_STATUS_TOPIC
-            from config.schemas import FactoryStatus
-            
-            factory_status = FactoryStatus(
-                timestamp=self.env.now,
-                total_stations=len(self.stations),
-                total_agvs=len(self.agvs),
-                active_orders=len(self.kpi_calculator.active_orders),
-                total_orders=self.kpi_calculator.stats.total_orders,
-                completed_orders=self.kpi_calculator.stats.completed_orders,
-                active_faults=len(self.fault_system.active_faults) if self.fault_system else 0,
-                simulation_time=self.env.now
-            )
-            
-            try:
-                if self.mqtt_client:
-                    self.mqtt_client.publish(FACTORY_STATUS_TOPIC, factory_status)
-                print(f"[{self.env.now:.2f}] 📊 Published factory status: {factory_status.active_orders} active orders, {factory_status.active_faults} faults")
-            except Exception as e:
-                print(f"[{self.env.now:.2f}] ❌ Failed to publish factory status: {e}")
+            next_time = schedule[0][0]
+            if next_time > env.now:
+                yield env.timeout(next_time - env.now)
+            while schedule[0][0] <= env.now:
+                due, index, period, handler = heapq.heappop(schedule)
+                if _PROFILE:
+                    start_ns = time.perf_counter_ns()
+                    handler()
+                    self._record_prof(handler.__name__, start_ns)
+                else:
+                    handler()
+                heapq.heappush(schedule, (due + period, index, period, handler))
+
+    def _record_prof(self, name: str, start_ns: int):
+        """Accumulate call count and wall time (ns) for a profiled section."""
+        prof = self._prof
+        prof[name + "_ns"] = prof.get(name + "_ns", 0) + time.perf_counter_ns() - start_ns
+        prof[name + "_n"] = prof.get(name + "_n", 0) + 1
+
+    def _publish_factory_status(self):
+        """Publish factory overall status (scheduled every 30 seconds)."""
+        # Create factory status summary
+        # 字段与FactoryStatus一致，直接用字典发布以跳过Pydantic校验
+        now = float(self.env.now)
+        stats = self.kpi_calculator.stats
+        active_orders = len(self.kpi_calculator.active_orders)
+        active_faults = len(self.fault_system.active_faults) if self.fault_system else 0
+        factory_status = {
+            "timestamp": now,
+            "total_stations": len(self.stations),
+            "total_agvs": len(self.agvs),
+            "active_orders": active_orders,
+            "total_orders": stats.total_orders,
+            "completed_orders": stats.completed_orders,
+            "active_faults": active_faults,
+            "simulation_time": now
+        }
+        
+        self._queue_publish(FACTORY_STATUS_TOPIC, factory_status)
+        # 周期发布路径使用惰性%格式化，未开启debug时不做任何格式化和输出
+        logger.debug("[%.2f] 📊 Queued factory status: %d active orders, %d faults",
+                     now, active_orders, active_faults)
 
     def _publish_fault_events(self):
         """Publish enhanced fault events to make them more visible."""
@@ -339,13 +392,37 @@ class Factory:
                     }
                     
                     try:
-                        import json
                         if self.mqtt_client:
                             self.mqtt_client.publish(f"factory/alerts/{device_id}", json.dumps(fault_alert))
                         print(f"[{self.env.now:.2f}] 🚨 Enhanced fault alert published for {device_id}: {fault.symptom}")
                     except Exception as e:
                         print(f"[{self.env.now:.2f}] ❌ Failed to publish fault alert: {e}")
 
+    def _queue_publish(self, topic: str, payload):
+        """
+        Queue an MQTT message; everything queued at the same simulation time
+        is flushed together by a single zero-delay event.
+        """
+        if not self.mqtt_client:
+            return
+        self._pending_publishes.append((topic, payload))
+        if self._flush_event is None:
+            self._flush_event = self.env.timeout(0)
+            self._flush_event.callbacks.append(self._flush_publishes)
+
+    def _flush_publishes(self, event: simpy.Event):
+        """Publish all queued messages with one publish_many() call."""
+        batch = self._pending_publishes
+        self._pending_publishes = []
+        self._flush_event = None
+        start_ns = time.perf_counter_ns() if _PROFILE else 0
+        try:
+            self.mqtt_client.publish_many(batch)
+        except Exception as e:
+            logger.error("[%.2f] ❌ Failed to publish %d queued message(s): %s", self.env.now, len(batch), e)
+        if _PROFILE:
+            self._record_prof("_flush_publishes", start_ns)
+
 
     def run(self, until: int):
         """Runs the simulation for a given duration."""
@@ -357,7 +434,7 @@ class Factory:
         # - Order generation: self.order_generator.run() (auto-started)
         # - Fault injection: self.fault_system.run_fault_injection() (auto-started) 
         # - KPI updates: self.kpi_calculator.run_kpi_updates() (auto-started)
-        # - MQTT publishing: self._start_status_publishing() (started in __init__)
+        # - Fault count / factory status: self._start_periodic_tasks() (started in __init__)
         """
         # print(f"--- Active processes: Order Gen, Fault Injection, KPI Updates, MQTT Publishing ---")
         self.env.run(until=until)
@@ -371,19 +448,21 @@ class Factory:
     
     def get_factory_stats(self) -> Dict:
         """Get comprehensive factory statistics"""
-        station_stats = {}
-        for station_id, station in self.stations.items():
-            if hasattr(station, 'get_processing_stats'):
-                station_stats[station_id] = station.get_processing_stats()
+        station_stats = {
+            station_id: station.get_processing_stats()
+            for station_id, station in self.stations.items()
+            if hasattr(station, 'get_processing_stats')
+        }
         
-        agv_stats = {}
-        for agv_id, agv in self.agvs.items():
-            agv_stats[agv_id] = {
+        agv_stats = {
+            agv_id: {
                 "status": agv.status.value,
                 "position": agv.position,
-                "battery_level": getattr(agv, 'battery_level', 100.0),
+                "battery_level": agv.battery_level,
                 "payload_count": len(agv.payload.items)  # Use .items for SimPy Store
             }
+            for agv_id, agv in self.agvs.items()
+        }
         
         return {
             "timestamp": self.env.now,
@@ -394,44 +473,20 @@ class Factory:
             "active_transport_tasks": len(self.agv_task_queue.items)
         }
 
-    def _bind_conveyors_to_stations(self):
-        """Bind conveyors to stations according to the process flow."""
-        # StationA → conveyor_ab
-        if 'StationA' in self.stations and 'Conveyor_AB' in self.conveyors:
-            self.stations['StationA'].downstream_conveyor = self.conveyors['Conveyor_AB']
-        # StationB → conveyor_bc
-        if 'StationB' in self.stations and 'Conveyor_BC' in self.conveyors:
-            self.stations['StationB'].downstream_conveyor = self.conveyors['Conveyor_BC']
-        # StationC → conveyor_cq (TripleBufferConveyor)
-        if 'StationC' in self.stations and 'Conveyor_CQ' in self.conveyors:
-            self.stations['StationC'].downstream_conveyor = self.conveyors['Conveyor_CQ']
-
-    def _setup_conveyor_downstreams(self):
-        """Set downstream stations for conveyors to enable auto-transfer."""
-        # conveyor_ab → StationB
-        if 'StationB' in self.stations and 'Conveyor_AB' in self.conveyors:
-            self.conveyors['Conveyor_AB'].set_downstream_station(self.stations['StationB'])
-        # conveyor_bc → StationC
-        if 'StationC' in self.stations and 'Conveyor_BC' in self.conveyors:
-            self.conveyors['Conveyor_BC'].set_downstream_station(self.stations['StationC'])
-        # conveyor_cq → QualityCheck
-        if 'QualityCheck' in self.stations and 'Conveyor_CQ' in self.conveyors:
-            self.conveyors['Conveyor_CQ'].set_downstream_station(self.stations['QualityCheck'])
+    def get_profiling_stats(self) -> Dict[str, int]:
+        """Call counts and accumulated wall time (ns) of periodic work; empty unless _PROFILE is enabled."""
+        return dict(self._prof)
     
     def _update_active_faults_count(self):
-        """Periodically update the active faults count in KPI calculator."""
-        while True:
-            # For single-line factory, just count faults from the single FaultSystem
-            active_faults_count = 0
-            if self.fault_system:
-                active_faults_count = len(self.fault_system.active_faults)
-            
-            # Update KPI calculator with the count
-            if self.kpi_calculator:
-                self.kpi_calculator.update_active_faults_count(active_faults_count)
-            
-            # Wait for 1 second before next update
-            yield self.env.timeout(1.0)
+        """Update the active faults count in KPI calculator (scheduled every second)."""
+        # For single-line factory, just count faults from the single FaultSystem
+        active_faults_count = 0
+        if self.fault_system:
+            active_faults_count = len(self.fault_system.active_faults)
+        
+        # Update KPI calculator with the count
+        if self.kpi_calculator:
+            self.kpi_calculator.update_active_faults_count(active_faults_count)
 
 
 # Example of how to run the factory simulation
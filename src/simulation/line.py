@@ -2,7 +2,7 @@
 import simpy
 from typing import Dict, List, Optional
 
-from src.simulation.entities.conveyor import Conveyor, TripleBufferConveyor, BaseConveyor
+from src.simulation.entities.conveyor import Conveyor, TripleBufferConveyor, BaseConveyor, wire_conveyors
 from src.simulation.entities.warehouse import Warehouse, RawMaterial
 from src.simulation.entities.station import Station
 from src.simulation.entities.agv import AGV
@@ -56,8 +56,7 @@ class Line:
         self._setup_event_handlers()
 
         self._create_game_logic_systems()
-        self._bind_conveyors_to_stations()
-        self._setup_conveyor_downstreams()
+        wire_conveyors(self.stations, self.conveyors)
 
     def _create_devices(self):
         """Instantiates all devices for this line based on its configuration."""
@@ -120,21 +119,3 @@ class Line:
         # Force initial KPI update
         if self.kpi_calculator:
             self.kpi_calculator.force_kpi_update()
-
-    def _bind_conveyors_to_stations(self):
-        """Bind conveyors to stations according to the process flow."""
-        if 'StationA' in self.stations and 'Conveyor_AB' in self.conveyors:
-            self.stations['StationA'].downstream_conveyor = self.conveyors['Conveyor_AB']
-        if 'StationB' in self.stations and 'Conveyor_BC' in self.conveyors:
-            self.stations['StationB'].downstream_conveyor = self.conveyors['Conveyor_BC']
-        if 'StationC' in self.stations and 'Conveyor_CQ' in self.conveyors:
-            self.stations['StationC'].downstream_conveyor = self.conveyors['Conveyor_CQ']
-
-    def _setup_conveyor_downstreams(self):
-        """Set downstream stations for conveyors to enable auto-transfer."""
-        if 'StationB' in self.stations and 'Conveyor_AB' in self.conveyors:
-            self.conveyors['Conveyor_AB'].set_downstream_station(self.stations['StationB'])
-        if 'StationC' in self.stations and 'Conveyor_BC' in self.conveyors:
-            self.conveyors['Conveyor_BC'].set_downstream_station(self.stations['StationC'])
-        if 'QualityCheck' in self.stations and 'Conveyor_CQ' in self.conveyors:
-            self.conveyors['Conveyor_CQ'].set_downstream_station(self.stations['QualityCheck'])
@@ -3,10 +3,18 @@ Configuration loader for SUPCON Factory Simulation
 Loads configuration from YAML files and provides typed access to configuration data.
 """
 
+import copy
 import yaml
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Any, Optional
 
+@lru_cache(maxsize=8)
+def _parse_yaml_file(config_file: Path) -> Dict[str, Any]:
+    """解析并缓存YAML文件，同一文件只解析一次"""
+    with open(config_file, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
 class ConfigLoader:
     """simplified config loader - load yaml file to dict"""
     
@@ -20,8 +28,8 @@ class ConfigLoader:
         if not config_file.exists():
             raise FileNotFoundError(f"Configuration file not found: {config_file}")
         
-        with open(config_file, 'r', encoding='utf-8') as f:
-            config = yaml.safe_load(f)
+        # 缓存的是解析结果，调用方拿到独立副本，可以自由修改而不影响缓存
+        config = copy.deepcopy(_parse_yaml_file(config_file.resolve()))
         
         # # simple validation for required fields
         # required_sections = ['stations', 'agvs', 'conveyors', 'warehouses']
@@ -2,6 +2,9 @@ import logging
 import os
 from logging.handlers import RotatingFileHandler
 
+# 调试输出开关：关闭时状态变更、加工/搬运等高频路径不构造也不打印调试字符串
+SIM_DEBUG = False
+
 class SimTimeFormatter(logging.Formatter):
     """
     A custom log formatter that produces a compact, simulation-focused output.
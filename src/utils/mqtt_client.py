@@ -2,15 +2,33 @@
 import logging
 import threading
 import paho.mqtt.client as mqtt
-from typing import Callable, Optional
+from typing import Callable, List, Optional, Tuple
 from pydantic import BaseModel
 import time
 import os
+import json
 from src.utils.topic_manager import TopicManager
 
+try:
+    import orjson  # 可选依赖，安装后用于加速状态消息序列化
+except ImportError:
+    orjson = None
+
 # Configure logger
 logger = logging.getLogger(__name__)
 
+# 设备状态消息会被下一次发布覆盖，使用QoS 0避免broker的确认往返
+STATUS_QOS = 0
+
+def dumps_payload(data: dict):
+    """
+    将已经是合法结构的消息字典直接序列化为JSON，跳过Pydantic的重复校验。
+    输出格式与model_dump_json()一致（紧凑分隔符，不转义非ASCII字符）。
+    """
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
 class MQTTClient:
     """
     A robust wrapper for the paho-mqtt client providing easy-to-use
@@ -148,27 +166,46 @@ class MQTTClient:
         self._message_callbacks[topic] = callback
         self._client.subscribe(topic, qos)
 
-    def publish(self, topic: str, payload: str | BaseModel, qos: int = 1, retain: bool = False):
+    @staticmethod
+    def _encode_payload(payload: str | bytes | dict | BaseModel):
+        """Converts a payload into the str/bytes message sent to the broker."""
+        if isinstance(payload, (str, bytes)):
+            return payload
+        elif isinstance(payload, dict):
+            return dumps_payload(payload)
+        elif isinstance(payload, BaseModel):
+            return payload.model_dump_json()
+        else:
+            return str(payload)
+            # raise TypeError("Payload must be a string or a Pydantic BaseModel")
+
+    def publish(self, topic: str, payload: str | bytes | dict | BaseModel, qos: int = 1, retain: bool = False):
         """
         Publishes a message to a topic.
 
         Args:
             topic (str): The topic to publish to.
-            payload (str | BaseModel): The message payload. If it's a Pydantic BaseModel,
+            payload (str | bytes | dict | BaseModel): The message payload. If it's a Pydantic BaseModel,
                                        it will be automatically converted to a JSON string.
+                                       A dict is serialized as-is without schema validation.
             qos (int): The Quality of Service level for the message.
             retain (bool): Whether the message should be retained by the broker.
         """
-        if isinstance(payload, BaseModel):
-            message = payload.model_dump_json()
-        elif isinstance(payload, str):
-            message = payload
-        else:
-            message = str(payload)
-            # raise TypeError("Payload must be a string or a Pydantic BaseModel")
-        result = self._client.publish(topic, message, qos, retain)
+        result = self._client.publish(topic, self._encode_payload(payload), qos, retain)
         if result.rc != mqtt.MQTT_ERR_SUCCESS:
             logger.error(f"Failed to publish to topic {topic}: {mqtt.error_string(result.rc)}") 
 
+    def publish_many(self, messages: List[Tuple[str, str | bytes | dict | BaseModel]], qos: int = 1, retain: bool = False):
+        """
+        Publishes a batch of (topic, payload) messages in one call.
+        Payloads are encoded the same way as in publish().
+        """
+        client_publish = self._client.publish
+        encode = self._encode_payload
+        for topic, payload in messages:
+            result = client_publish(topic, encode(payload), qos, retain)
+            if result.rc != mqtt.MQTT_ERR_SUCCESS:
+                logger.error(f"Failed to publish to topic {topic}: {mqtt.error_string(result.rc)}")
+
     def is_connected(self):
         return self._client.is_connected()
\ No newline at end of file
@@ -0,0 +1,87 @@
+import simpy
+
+from src.simulation.entities.conveyor import Conveyor, TripleBufferConveyor
+from src.simulation.entities.station import Station
+from src.simulation.entities.product import Product
+from src.utils.logger_config import get_sim_logger
+
+
+class RecordingKPI:
+    """只记录传送带上报的能耗调用"""
+
+    def __init__(self):
+        self.energy_calls = []
+
+    def add_energy_cost(self, device_id, line_id, duration, is_peak_hour=False):
+        self.energy_calls.append(duration)
+
+    def update_device_utilization(self, *args):
+        pass
+
+    def register_total_time_device(self, *args):
+        pass
+
+
+def make_downstream(env):
+    # 加工时间足够长，产品到达后一直留在buffer中便于检查顺序
+    return Station(
+        env, "StationC", (0, 0), get_sim_logger(env, "test.station"),
+        buffer_size=5, processing_times={"P1": (1000, 1000)},
+    )
+
+
+def record_arrivals(env, station, arrivals):
+    seen = set()
+    while True:
+        for p in station.buffer.items:
+            if p.id not in seen:
+                seen.add(p.id)
+                arrivals.append((p.id, env.now))
+        yield env.timeout(0.1)
+
+
+def run_non_leader_finishing_first(env, conveyor, buffer):
+    """
+    第二个产品（例如中断后恢复、已传输了一部分）比队首产品先完成传输：
+    它必须等队首产品离开后再出队，且不能被重新传输一次。
+    """
+    station = make_downstream(env)
+    conveyor.set_downstream_station(station)
+    first, second = Product("P1", "order_1"), Product("P1", "order_1")
+    buffer.put(first)
+    buffer.put(second)
+    conveyor.product_elapsed_times[second.id] = 3.0
+
+    arrivals = []
+    env.process(record_arrivals(env, station, arrivals))
+    env.run(until=20)
+    return first, second, station, arrivals
+
+
+def test_conveyor_non_leader_is_not_transferred_twice():
+    env = simpy.Environment()
+    kpi = RecordingKPI()
+    conveyor = Conveyor(env, "Conveyor_BC", 3, (0, 0), [], get_sim_logger(env, "test.conveyor"),
+                        transfer_time=5.0, kpi_calculator=kpi)
+
+    first, second, station, arrivals = run_non_leader_finishing_first(env, conveyor, conveyor.buffer)
+
+    assert [p.id for p in station.buffer.items] == [first.id, second.id]
+    # 第二个产品在队首产品离开后立即跟上，而不是再等一个完整的transfer_time
+    assert arrivals[0][1] == arrivals[1][1] < 6
+    assert len(kpi.energy_calls) == 2
+    assert conveyor.is_empty()
+
+
+def test_triple_buffer_conveyor_non_leader_is_not_transferred_twice():
+    env = simpy.Environment()
+    kpi = RecordingKPI()
+    conveyor = TripleBufferConveyor(env, "Conveyor_CQ", 3, 2, 2, (0, 0), get_sim_logger(env, "test.conveyor"),
+                                    transfer_time=5.0, kpi_calculator=kpi)
+
+    first, second, station, arrivals = run_non_leader_finishing_first(env, conveyor, conveyor.main_buffer)
+
+    assert [p.id for p in station.buffer.items] == [first.id, second.id]
+    assert arrivals[0][1] == arrivals[1][1] < 6
+    assert len(kpi.energy_calls) == 2
+    assert conveyor.is_empty()
@@ -0,0 +1,38 @@
+import simpy
+
+from config.schemas import DeviceStatus
+from src.simulation.factory import Factory
+from src.simulation.entities.station import Station
+from src.utils.logger_config import get_sim_logger
+
+
+def make_factory_with_station():
+    # 只搭建get_device_status用到的部分，不加载完整布局
+    env = simpy.Environment()
+    station = Station(env, "StationA", (0, 0), get_sim_logger(env, "test.station"))
+    factory = Factory.__new__(Factory)
+    factory.env = env
+    factory.all_devices = {"StationA": station}
+    factory._device_kind = {"StationA": "station"}
+    factory._status_cache = {}
+    return factory, station
+
+
+def test_device_status_is_a_copy():
+    factory, _ = make_factory_with_station()
+
+    status = factory.get_device_status("StationA")
+    status["status"] = "tampered"
+
+    assert factory.get_device_status("StationA")["status"] == DeviceStatus.IDLE.value
+
+
+def test_device_status_refreshes_after_same_instant_status_change():
+    factory, station = make_factory_with_station()
+
+    assert factory.get_device_status("StationA")["status"] == DeviceStatus.IDLE.value
+    station.set_status(DeviceStatus.MAINTENANCE)
+
+    status = factory.get_device_status("StationA")
+    assert status["status"] == DeviceStatus.MAINTENANCE.value
+    assert status["can_operate"] is False
@@ -0,0 +1,102 @@
+import simpy
+
+from config.schemas import DeviceStatus
+from src.simulation.entities.station import Station
+from src.simulation.entities.quality_checker import QualityChecker
+from src.simulation.entities.product import Product
+from src.utils.logger_config import get_sim_logger
+
+
+def make_station(env, buffer_size=1, processing_time=10):
+    return Station(
+        env, "StationB", (0, 0), get_sim_logger(env, "test.station"),
+        buffer_size=buffer_size,
+        processing_times={"P1": (processing_time, processing_time)},
+    )
+
+
+def feed(env, station, accepted):
+    """上游不断尝试放入产品，记录每个产品被buffer接收的时间"""
+    while True:
+        product = Product("P1", "order_1")
+        yield station.buffer.put(product)
+        accepted.append(env.now)
+
+
+def watch_occupancy(env, station, samples):
+    while True:
+        samples.append(len(station.buffer.items))
+        yield env.timeout(0.5)
+
+
+def inject_fault(env, station, at, duration):
+    yield env.timeout(at)
+    if station.action is not None:
+        station.action.interrupt("Fault injected")
+    station.set_status(DeviceStatus.FAULT)
+    yield env.timeout(duration)
+    station.recover()
+
+
+def test_product_in_process_occupies_buffer_slot():
+    env = simpy.Environment()
+    station = make_station(env)
+    accepted = []
+    env.process(feed(env, station, accepted))
+
+    env.run(until=5)
+
+    # 加工中的产品仍在buffer中，上游只能放入一个产品
+    assert accepted == [0]
+    assert len(station.buffer.items) == 1
+    assert station.current_product_id == station.buffer.items[0].id
+
+
+def test_buffer_occupancy_within_capacity_under_interrupts():
+    env = simpy.Environment()
+    station = make_station(env)
+    accepted, samples = [], []
+    env.process(feed(env, station, accepted))
+    env.process(watch_occupancy(env, station, samples))
+    env.process(inject_fault(env, station, at=4, duration=6))
+    env.process(inject_fault(env, station, at=25, duration=3))
+
+    env.run(until=60)
+
+    assert max(samples) <= station.buffer.capacity
+    assert len(station.buffer.items) <= station.buffer.capacity
+    # 中断的产品恢复后继续加工：4s + 6s(剩余) -> 16s完成第一个，之后每10s一个（第二次故障推迟3s）
+    assert station.stats["products_processed"] == 5
+
+
+def test_interrupted_product_resumes_with_remaining_time():
+    env = simpy.Environment()
+    station = make_station(env)
+    first = Product("P1", "order_1")
+    station.buffer.put(first)
+    env.process(inject_fault(env, station, at=4, duration=6))
+
+    env.run(until=15.9)
+    assert station.stats["products_processed"] == 0
+    assert station.buffer.items == [first]
+
+    env.run(until=16.1)
+    assert station.stats["products_processed"] == 1
+    assert first.id not in [p.id for p in station.buffer.items]
+
+
+def test_quality_checker_buffer_occupancy_within_capacity_under_interrupts():
+    env = simpy.Environment()
+    checker = QualityChecker(
+        env, "QualityCheck", (0, 0), get_sim_logger(env, "test.quality_checker"),
+        buffer_size=1, processing_times={"P1": (10, 10)},
+    )
+    accepted, samples = [], []
+    env.process(feed(env, checker, accepted))
+    env.process(watch_occupancy(env, checker, samples))
+    env.process(inject_fault(env, checker, at=4, duration=6))
+
+    env.run(until=40)
+
+    assert max(samples) <= checker.buffer.capacity
+    assert checker.stats["inspected_count"] == len(accepted) - 1
@@ -0,0 +1,52 @@
+import simpy
+
+from config.schemas import DeviceStatus
+from src.simulation.entities.station import Station
+from src.simulation.entities.product import Product
+from src.utils.logger_config import get_sim_logger
+
+
+def make_station(env):
+    return Station(
+        env, "StationB", (0, 0), get_sim_logger(env, "test.station"),
+        processing_times={"P1": (10, 10)},
+    )
+
+
+def put_at(env, station, at, product):
+    yield env.timeout(at)
+    yield station.buffer.put(product)
+
+
+def test_empty_station_starts_when_product_arrives():
+    env = simpy.Environment()
+    station = make_station(env)
+    product = Product("P1", "order_1")
+    env.process(put_at(env, station, 3.37, product))
+
+    env.run(until=3.5)
+
+    # 放入产品的同一时刻开始加工，而不是等到下一个轮询周期
+    assert station.status is DeviceStatus.PROCESSING
+    assert station.proc.start_time == 3.37
+    assert station.buffer.items == [product]
+
+
+def test_faulted_station_resumes_when_status_recovers():
+    env = simpy.Environment()
+    station = make_station(env)
+    station.set_status(DeviceStatus.FAULT)
+    station.buffer.put(Product("P1", "order_1"))
+
+    def recover_at(at):
+        yield env.timeout(at)
+        station.recover()
+
+    env.process(recover_at(7.3))
+    env.run(until=7.5)
+
+    assert station.status is DeviceStatus.PROCESSING
+    assert station.proc.start_time == 7.3
+
+    env.run(until=17.4)
+    assert station.stats["products_processed"] == 1